@@ -0,0 +1,198 @@
+from collections.abc import Callable
+from contextlib import asynccontextmanager
+from fastapi import HTTPException
+
+import httpx
+
+
+def parse_argo_error(response: dict) -> dict | None:
+    """
+    Check for errors in the Argo Workflows response and return those errors if any.
+    """
+
+    match response.get("code"):
+        case 7:
+            return {
+                "error": "Namespace not found or not permitted.",
+                "argo_status_code": response["code"],
+                "message": response["message"],
+            }
+        case 5:
+            if "workflowtemplates" in response["message"]:
+                missing_resource = "Workflow template"
+            else:
+                missing_resource = "Workflow"
+            return {
+                "error": f"{missing_resource} not found.",
+                "argo_status_code": response["code"],
+                "response": response["message"],
+            }
+        case None:
+            pass
+
+
+class ArgoClient:
+    """
+    Shared async HTTP client for the Argo Workflows server.
+
+    A single pooled httpx.AsyncClient is opened in the application lifespan so
+    that connections to the Argo server are kept alive and reused across requests,
+    rather than a new connection being made (and the event loop blocked) per call.
+    """
+
+    def __init__(
+        self,
+        server: str,
+        token: Callable[[], str],
+        verify_tls: bool = True,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 30.0,
+        timeout: float = 30.0,
+        connect_timeout: float = 5.0,
+    ):
+        self.server = server
+        self.token = token
+        self.verify_tls = verify_tls
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.client: httpx.AsyncClient | None = None
+
+    async def start(self) -> None:
+        """Open the connection pool. Called once on application startup."""
+        if self.client is None:
+            self.client = httpx.AsyncClient(
+                base_url=self.server,
+                verify=self.verify_tls,
+                limits=self.limits,
+                timeout=self.timeout,
+            )
+
+    async def close(self) -> None:
+        """Close the connection pool. Called once on application shutdown."""
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    def _headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.token()}"}
+
+    def _timeout(self, timeout: float | None) -> httpx.Timeout:
+        if timeout is None:
+            return self.timeout
+        return httpx.Timeout(timeout, connect=self.timeout.connect)
+
+    def handle_transport_error(self, error: httpx.HTTPError):
+        if isinstance(error, httpx.TimeoutException):
+            raise HTTPException(
+                status_code=504, detail="Timed out waiting for Argo Workflows server"
+            )
+        raise HTTPException(
+            status_code=502, detail=f"Unable to reach Argo Workflows server: {error}"
+        )
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        params: dict | None = None,
+        json: dict | None = None,
+        timeout: float | None = None,
+    ) -> httpx.Response:
+        if self.client is None:
+            raise HTTPException(
+                status_code=503, detail="Argo Workflows client is not started"
+            )
+        try:
+            return await self.client.request(
+                method,
+                path,
+                params=params,
+                json=json,
+                headers=self._headers(),
+                timeout=self._timeout(timeout),
+            )
+        except httpx.HTTPError as error:
+            self.handle_transport_error(error)
+
+    async def get(
+        self, path: str, params: dict | None = None, timeout: float | None = None
+    ) -> httpx.Response:
+        return await self.request("GET", path, params=params, timeout=timeout)
+
+    async def post(
+        self, path: str, json: dict | None = None, timeout: float | None = None
+    ) -> httpx.Response:
+        return await self.request("POST", path, json=json, timeout=timeout)
+
+    @asynccontextmanager
+    async def stream(
+        self,
+        method: str,
+        path: str,
+        params: dict | None = None,
+        timeout: float | None = None,
+    ):
+        """
+        Stream a response from the Argo server without buffering the body.
+        The connection is returned to the pool when the context exits.
+        """
+        if self.client is None:
+            raise HTTPException(
+                status_code=503, detail="Argo Workflows client is not started"
+            )
+        try:
+            async with self.client.stream(
+                method,
+                path,
+                params=params,
+                headers=self._headers(),
+                timeout=self._timeout(timeout),
+            ) as response:
+                yield response
+        except httpx.HTTPError as error:
+            self.handle_transport_error(error)
+
+    async def open_stream(
+        self,
+        method: str,
+        path: str,
+        params: dict | None = None,
+        timeout: float | None = None,
+        read_timeout: bool = True,
+    ) -> httpx.Response:
+        """
+        Start streaming a response from the Argo server, returning once the headers
+        have arrived so the body can be passed on as it is read, e.g. by a
+        StreamingResponse. The caller must close the response with `aclose()`
+        to return the connection to the pool.
+        Set `read_timeout=False` for streams that may stay idle for a long time,
+        such as followed logs.
+        """
+        if self.client is None:
+            raise HTTPException(
+                status_code=503, detail="Argo Workflows client is not started"
+            )
+        request_timeout = self._timeout(timeout)
+        if not read_timeout:
+            request_timeout = httpx.Timeout(
+                connect=request_timeout.connect,
+                read=None,
+                write=request_timeout.write,
+                pool=request_timeout.pool,
+            )
+        request = self.client.build_request(
+            method,
+            path,
+            params=params,
+            headers=self._headers(),
+            timeout=request_timeout,
+        )
+        try:
+            return await self.client.send(request, stream=True)
+        except httpx.HTTPError as error:
+            self.handle_transport_error(error)
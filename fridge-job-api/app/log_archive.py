@@ -0,0 +1,408 @@
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from datetime import datetime, timezone
+from fastapi import HTTPException
+
+from app.argo_client import ArgoClient
+from app.minio_client import MinioClient
+from app.workflow_index import TERMINAL_PHASES, WorkflowIndex
+from app.workflow_logs import POD_FIELDS, WorkflowLogs, WorkflowPod, workflow_pods
+
+import asyncio
+import gzip
+import json
+import tempfile
+import time
+
+
+def timestamp_key(timestamp: str) -> str:
+    """
+    An RFC 3339 UTC timestamp with its fraction padded to nanoseconds. Kubernetes
+    trims trailing zeros from log timestamps, so they only compare correctly as
+    strings once padded.
+    """
+    seconds, _, fraction = timestamp.removesuffix("Z").partition(".")
+    return f"{seconds}.{fraction:0<9}Z"
+
+
+class ChunkedGzipWriter:
+    """
+    Writes log lines to a file as a multi-member gzip stream. Each member holds
+    about `chunk_size` bytes of log and can be decompressed on its own, and the
+    position of every member is recorded so it can be read back with a range request.
+    The file as a whole is still a valid gzip file.
+    """
+
+    def __init__(self, file, chunk_size: int):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.chunks: list[dict] = []
+        self.lines = 0
+        self.bytes = 0
+        self._buffer: list[bytes] = []
+        self._buffered = 0
+        self._first_timestamp: str | None = None
+
+    async def write_line(self, line: str, timestamp: str | None = None) -> None:
+        data = line.encode() + b"\n"
+        if not self._buffer:
+            self._first_timestamp = timestamp
+        self._buffer.append(data)
+        self._buffered += len(data)
+        if self._buffered >= self.chunk_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        if not self._buffer:
+            return
+        data = b"".join(self._buffer)
+        # Compress off the event loop, as a chunk can take tens of milliseconds
+        compressed = await asyncio.to_thread(gzip.compress, data)
+        self.chunks.append(
+            {
+                "offset": self.file.tell(),
+                "length": len(compressed),
+                "first_line": self.lines,
+                "lines": len(self._buffer),
+                "first_byte": self.bytes,
+                "bytes": len(data),
+                "first_timestamp": self._first_timestamp,
+            }
+        )
+        self.file.write(compressed)
+        self.lines += len(self._buffer)
+        self.bytes += len(data)
+        self._buffer = []
+        self._buffered = 0
+
+
+class LogArchive:
+    """
+    Archives the logs of finished workflows to Minio, so they can still be read
+    after the pods are deleted, without going through the Argo server.
+
+    Each pod's log is stored as a gzip object made of independently compressed
+    chunks, plus one JSON index per workflow recording the line and byte ranges of
+    every chunk. A range of lines or bytes is read by fetching and decompressing
+    only the chunks that overlap it.
+
+    When started, workflows in the index's namespaces are archived as soon as they
+    finish, by `concurrency` background workers.
+    """
+
+    def __init__(
+        self,
+        minio_client: MinioClient,
+        argo_client: ArgoClient,
+        workflow_index: WorkflowIndex,
+        workflow_logs: WorkflowLogs,
+        bucket: str | None,
+        prefix: str = "workflow-logs",
+        container: str = "main",
+        chunk_size: int = 1024 * 1024,
+        concurrency: int = 2,
+        index_cache_size: int = 1000,
+        missing_ttl: float = 60.0,
+    ):
+        self.minio_client = minio_client
+        self.argo_client = argo_client
+        self.workflow_index = workflow_index
+        self.workflow_logs = workflow_logs
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.container = container
+        self.chunk_size = chunk_size
+        self.concurrency = concurrency
+        self.index_cache_size = index_cache_size
+        self.missing_ttl = missing_ttl
+        # Archive indexes never change once written, so are cached indefinitely
+        self._indexes: OrderedDict[tuple[str, str], dict] = OrderedDict()
+        # When workflows were last found not to be archived, so that polling their
+        # logs does not look up the index in Minio on every request
+        self._missing: OrderedDict[tuple[str, str], float] = OrderedDict()
+        self._queue: asyncio.Queue[tuple[str, str]] = asyncio.Queue()
+        # Workflows queued or being archived, so each is only archived once
+        self._pending: set[tuple[str, str]] = set()
+        self._tasks: list[asyncio.Task] = []
+        self.archived = 0
+        self.failed = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.bucket)
+
+    def _path(self, namespace: str, workflow_name: str, name: str) -> str:
+        return f"{self.prefix}/{namespace}/{workflow_name}/{name}"
+
+    async def start(self) -> None:
+        """Archive workflows as they finish. Called once on application startup."""
+        if not self.enabled:
+            return
+        try:
+            await self.minio_client.run(self.minio_client.create_bucket, self.bucket)
+        except HTTPException as e:
+            print(f"Unable to create log archive bucket {self.bucket}: {e.detail}")
+        for namespace in self.workflow_index.namespaces:
+            self._tasks.append(
+                asyncio.create_task(
+                    self._watch(namespace), name=f"log-archive-{namespace}"
+                )
+            )
+        for worker in range(self.concurrency):
+            self._tasks.append(
+                asyncio.create_task(self._work(), name=f"log-archive-worker-{worker}")
+            )
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _watch(self, namespace: str) -> None:
+        """Queue workflows for archiving when the index reports that they finished."""
+        subscription = self.workflow_index.subscribe(namespace, event_types={"phase"})
+        try:
+            while True:
+                event = await subscription.get()
+                if event["type"] == "lagged":
+                    print(f"Log archive fell behind on {namespace}; some may be missed")
+                    self.workflow_index.unsubscribe(subscription)
+                    subscription = self.workflow_index.subscribe(
+                        namespace, event_types={"phase"}
+                    )
+                elif event["phase"] in TERMINAL_PHASES:
+                    key = (namespace, event["workflow"])
+                    if key not in self._pending:
+                        self._pending.add(key)
+                        self._queue.put_nowait(key)
+        finally:
+            self.workflow_index.unsubscribe(subscription)
+
+    async def _work(self) -> None:
+        while True:
+            namespace, workflow_name = await self._queue.get()
+            try:
+                # Check Minio itself, as another replica may have archived it since
+                if (
+                    await self.load_index(
+                        namespace, workflow_name, cached_missing=False
+                    )
+                    is None
+                ):
+                    await self.archive(
+                        namespace,
+                        workflow_name,
+                        await self._pods(namespace, workflow_name),
+                    )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                detail = e.detail if isinstance(e, HTTPException) else e
+                print(
+                    f"Unable to archive logs of {namespace}/{workflow_name}: {detail}"
+                )
+            finally:
+                self._pending.discard((namespace, workflow_name))
+
+    async def _pods(self, namespace: str, workflow_name: str) -> list[WorkflowPod]:
+        r = await self.argo_client.get(
+            f"/api/v1/workflows/{namespace}/{workflow_name}",
+            params={"fields": POD_FIELDS},
+        )
+        if r.status_code != 200:
+            raise RuntimeError(f"workflow lookup failed with status {r.status_code}")
+        return workflow_pods(r.json())
+
+    async def archive(
+        self, namespace: str, workflow_name: str, pods: list[WorkflowPod]
+    ) -> dict:
+        """
+        Archive the logs of the given pods of a finished workflow, one pod at a time,
+        and return the archive index. Existing archives are overwritten.
+        """
+        index = {
+            "namespace": namespace,
+            "workflow": workflow_name,
+            "container": self.container,
+            "archived_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "pods": [
+                await self._archive_pod(namespace, workflow_name, pod) for pod in pods
+            ],
+        }
+        data = json.dumps(index).encode()
+        with tempfile.TemporaryFile() as file:
+            file.write(data)
+            file.seek(0)
+            await self.minio_client.run(
+                self.minio_client.put_file,
+                self.bucket,
+                self._path(namespace, workflow_name, "index.json"),
+                file,
+                len(data),
+                "application/json",
+            )
+        self._cache_index(namespace, workflow_name, index)
+        self.archived += 1
+        return index
+
+    async def _archive_pod(
+        self, namespace: str, workflow_name: str, pod: WorkflowPod
+    ) -> dict:
+        """Stream one pod's log from Argo into a compressed, chunked object."""
+        object_name = self._path(namespace, workflow_name, f"{pod.pod_name}.log.gz")
+        error = None
+        # Spool to disk so that memory use does not depend on the size of the log
+        with tempfile.TemporaryFile() as file:
+            writer = ChunkedGzipWriter(file, self.chunk_size)
+            async for entry in self.workflow_logs.pod_log(
+                namespace, workflow_name, pod, self.container
+            ):
+                if "error" in entry:
+                    error = entry["error"]
+                    continue
+                await writer.write_line(
+                    f"{entry['timestamp']} {entry['content']}", entry["timestamp"]
+                )
+            await writer.flush()
+            length = file.tell()
+            file.seek(0)
+            if length:
+                await self.minio_client.run(
+                    self.minio_client.put_file,
+                    self.bucket,
+                    object_name,
+                    file,
+                    length,
+                    "application/gzip",
+                )
+        return {
+            "pod_name": pod.pod_name,
+            "node": pod.display_name,
+            "object": object_name if length else None,
+            "lines": writer.lines,
+            "bytes": writer.bytes,
+            "chunks": writer.chunks,
+            "error": error,
+        }
+
+    def _cache_index(self, namespace: str, workflow_name: str, index: dict) -> None:
+        self._missing.pop((namespace, workflow_name), None)
+        self._indexes[(namespace, workflow_name)] = index
+        self._indexes.move_to_end((namespace, workflow_name))
+        while len(self._indexes) > self.index_cache_size:
+            self._indexes.popitem(last=False)
+
+    async def load_index(
+        self, namespace: str, workflow_name: str, cached_missing: bool = True
+    ) -> dict | None:
+        """
+        The archive index of a workflow, or None if its logs are not archived.
+        Workflows found not to be archived are remembered for `missing_ttl`
+        seconds, unless `cached_missing` is False.
+        """
+        if not self.enabled:
+            return None
+        key = (namespace, workflow_name)
+        if key in self._indexes:
+            self._indexes.move_to_end(key)
+            return self._indexes[key]
+        missing_at = self._missing.get(key)
+        if (
+            cached_missing
+            and missing_at is not None
+            and time.monotonic() - missing_at < self.missing_ttl
+        ):
+            return None
+        try:
+            data = await self.minio_client.run(
+                self.minio_client.read_object,
+                self.bucket,
+                self._path(namespace, workflow_name, "index.json"),
+            )
+        except HTTPException as e:
+            if e.status_code == 404:
+                self._missing[key] = time.monotonic()
+                self._missing.move_to_end(key)
+                while len(self._missing) > self.index_cache_size:
+                    self._missing.popitem(last=False)
+                return None
+            raise
+        index = json.loads(data)
+        self._cache_index(namespace, workflow_name, index)
+        return index
+
+    @staticmethod
+    def find_pod(index: dict, pod_name: str) -> dict | None:
+        """Find a pod in an archive index by pod or node name."""
+        for pod in index["pods"]:
+            if pod_name in (pod["pod_name"], pod["node"]):
+                return pod
+        # Single-pod workflows are looked up by the workflow name
+        if len(index["pods"]) == 1 and pod_name == index["workflow"]:
+            return index["pods"][0]
+        return None
+
+    async def _read_chunk(self, pod: dict, chunk: dict) -> bytes:
+        data = await self.minio_client.run(
+            self.minio_client.read_object,
+            self.bucket,
+            pod["object"],
+            chunk["offset"],
+            chunk["length"],
+        )
+        return await asyncio.to_thread(gzip.decompress, data)
+
+    @staticmethod
+    def first_line_since(pod: dict, timestamp: str) -> int:
+        """
+        The first line of the chunk that may hold the first line at or after
+        `timestamp`, so that earlier chunks need not be read.
+        """
+        start = 0
+        since = timestamp_key(timestamp)
+        for chunk in pod["chunks"]:
+            if (
+                chunk["first_timestamp"]
+                and timestamp_key(chunk["first_timestamp"]) >= since
+            ):
+                break
+            start = chunk["first_line"]
+        return start
+
+    async def read_lines(
+        self, pod: dict, start: int = 0, end: int | None = None
+    ) -> AsyncIterator[str]:
+        """Yield lines `start` to `end` (exclusive) of an archived pod log."""
+        end = pod["lines"] if end is None else min(end, pod["lines"])
+        for chunk in pod["chunks"]:
+            chunk_end = chunk["first_line"] + chunk["lines"]
+            if chunk_end <= start or chunk["first_line"] >= end:
+                continue
+            data = await self._read_chunk(pod, chunk)
+            lines = data.decode(errors="replace").split("\n")[:-1]
+            for line in lines[
+                max(start - chunk["first_line"], 0) : end - chunk["first_line"]
+            ]:
+                yield line
+
+    async def read_bytes(self, pod: dict, start: int, end: int) -> AsyncIterator[bytes]:
+        """Yield bytes `start` to `end` (inclusive) of an archived pod log."""
+        for chunk in pod["chunks"]:
+            chunk_end = chunk["first_byte"] + chunk["bytes"]
+            if chunk_end <= start or chunk["first_byte"] > end:
+                continue
+            data = await self._read_chunk(pod, chunk)
+            yield data[
+                max(start - chunk["first_byte"], 0) : end + 1 - chunk["first_byte"]
+            ]
+
+    def status(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "bucket": self.bucket,
+            "queued": self._queue.qsize(),
+            "archived": self.archived,
+            "failed": self.failed,
+        }
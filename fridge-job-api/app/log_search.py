@@ -0,0 +1,115 @@
+from collections import deque
+from collections.abc import AsyncIterator, Callable
+from re import _constants, _parser
+
+import re
+
+# Longest search pattern accepted, to bound the cost of compiling a regex
+MAX_PATTERN_LENGTH = 1000
+
+REPEATS = {_constants.MAX_REPEAT, _constants.MIN_REPEAT, _constants.POSSESSIVE_REPEAT}
+
+
+def check_backtracking(pattern: list, repeated: bool = False) -> None:
+    """
+    Reject parsed regular expressions that can take exponential time to match,
+    as matching runs on the event loop. Those are the patterns with backreferences,
+    or with a quantifier or alternation inside a repeated group, like `(a+)+$`.
+    Raises ValueError for such a pattern.
+    """
+    for op, av in pattern:
+        if op in (_constants.GROUPREF, _constants.GROUPREF_EXISTS):
+            raise ValueError("Search pattern must not contain backreferences")
+        if repeated and (op in REPEATS or op is _constants.BRANCH):
+            raise ValueError(
+                "Search pattern must not repeat a group that contains a quantifier "
+                "or alternation"
+            )
+        inner = repeated
+        if op in REPEATS:
+            subpatterns = [av[2]]
+            # Only repeating more than once can backtrack exponentially
+            inner = repeated or av[1] > 1
+        elif op is _constants.SUBPATTERN:
+            subpatterns = [av[3]]
+        elif op is _constants.BRANCH:
+            subpatterns = av[1]
+        elif op in (_constants.ASSERT, _constants.ASSERT_NOT):
+            subpatterns = [av[1]]
+        elif op is _constants.ATOMIC_GROUP:
+            subpatterns = [av]
+        else:
+            subpatterns = []
+        for subpattern in subpatterns:
+            check_backtracking(subpattern, inner)
+
+
+def compile_matcher(
+    pattern: str, regex: bool = False, ignore_case: bool = False
+) -> Callable[[str], bool]:
+    """
+    Build a function that tests whether a log line matches `pattern`, either as a
+    plain substring or as a regular expression. Raises ValueError if the pattern
+    is empty, too long, not a valid regular expression or one that can backtrack
+    exponentially.
+    """
+    if not pattern:
+        raise ValueError("Search pattern must not be empty")
+    if len(pattern) > MAX_PATTERN_LENGTH:
+        raise ValueError(
+            f"Search pattern must be at most {MAX_PATTERN_LENGTH} characters"
+        )
+    if regex:
+        try:
+            compiled = re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+        except re.error as e:
+            raise ValueError(f"Invalid regular expression: {e}") from None
+        check_backtracking(_parser.parse(pattern, compiled.flags))
+        return lambda line: compiled.search(line) is not None
+    if ignore_case:
+        folded = pattern.casefold()
+        return lambda line: folded in line.casefold()
+    # A substring test is much faster than the equivalent regex
+    return lambda line: pattern in line
+
+
+async def search_log(
+    entries: AsyncIterator[dict],
+    matches: Callable[[str], bool],
+    context: int = 0,
+    max_matches: int | None = None,
+) -> AsyncIterator[dict]:
+    """
+    Yield the log entries whose `content` matches, with up to `context` entries
+    before and after each match, like `grep -C`. Each entry gains its `line`
+    number, counting from 0, and whether it is a `match` or only context.
+
+    Entries are read one at a time, keeping only the context lines in memory.
+    Reading stops as soon as `max_matches` matches and their trailing context have
+    been yielded, so the rest of the log is never read. An `error` entry is passed
+    on and ends the search.
+    """
+    before: deque[dict] = deque(maxlen=context)
+    after = 0
+    found = 0
+    line = 0
+    async for entry in entries:
+        if "error" in entry:
+            yield entry
+            return
+        entry = {**entry, "line": line}
+        line += 1
+        # Lines after the last allowed match are only context
+        if found != max_matches and matches(entry["content"]):
+            found += 1
+            while before:
+                yield {**before.popleft(), "match": False}
+            yield {**entry, "match": True}
+            after = context
+        elif after:
+            after -= 1
+            yield {**entry, "match": False}
+        elif context:
+            before.append(entry)
+        if found == max_matches and not after:
+            return
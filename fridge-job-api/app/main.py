@@ -1,14 +1,52 @@
+import asyncio
+import base64
+import hashlib
+import httpx
 import json
 import os
-import requests
+import re
+import tempfile
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
-from fastapi import Depends, FastAPI, HTTPException, UploadFile, File
+from fastapi import (
+    Depends,
+    FastAPI,
+    Header,
+    HTTPException,
+    Path,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+    File,
+)
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
 from importlib.metadata import PackageNotFoundError, version
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_serializer
 from secrets import compare_digest
-from typing import Annotated, Any, Union
-from app.minio_client import MinioClient
+from starlette.background import BackgroundTask
+from typing import Annotated, Any, Literal, Union
+from app.argo_client import ArgoClient, parse_argo_error
+from app.log_archive import LogArchive, timestamp_key
+from app.log_search import compile_matcher, search_log
+from app.minio_client import MinioClient, parse_range
+from app.service_account_token import ServiceAccountToken
+from app.template_cache import WorkflowTemplateCache
+from app.workflow_index import (
+    LABEL_VALUE,
+    TERMINAL_PHASES,
+    WORKFLOW_PHASE_LABEL,
+    WORKFLOW_TEMPLATE_LABEL,
+    LabelRequirement,
+    WorkflowIndex,
+    WorkflowSummary,
+    parse_label_selector,
+    workflow_event,
+)
+from app.workflow_logs import POD_FIELDS, WorkflowLogs, parse_log_line, workflow_pods
 
 
 def get_version() -> str:
@@ -60,20 +98,32 @@ and submit workflows based on templates.
 
 """
 
-app = FastAPI(title="FRIDGE API", description=description, version=APP_VERSION)
-
 
 # On the Kubernetes cluster, the Argo token is stored in a service account token file on a projected volume
 # The token expires after one hour; the file on the volume is updated automatically by Kubernetes
-# Reading the token from the file when required ensures that we always use a valid token
+# The token is cached in memory and the file is only re-read when Kubernetes replaces it,
+# or when the cached token is close to expiry
 # If not running in the cluster, we use the ARGO_TOKEN environment variable
+argo_sa_token = ServiceAccountToken(
+    "/service-account/token",
+    expiry_seconds=int(os.getenv("ARGO_TOKEN_EXPIRY", 3600)),
+    refresh_margin=int(os.getenv("ARGO_TOKEN_REFRESH_MARGIN", 300)),
+    check_interval=float(os.getenv("ARGO_TOKEN_CHECK_INTERVAL", 5)),
+)
+
+
 def argo_token() -> str:
     """
     Load the ARGO token on request from the environment variable or from the service account token file if running in a Kubernetes cluster.
     """
     if os.getenv("KUBERNETES_SERVICE_HOST"):
-        with open("/service-account/token", "r") as f:
-            ARGO_TOKEN = f.read().strip()
+        try:
+            ARGO_TOKEN = argo_sa_token.get()
+        except OSError as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Unable to read service account token: {e}",
+            )
     else:
         ARGO_TOKEN = os.getenv("ARGO_TOKEN")
         if ARGO_TOKEN is None:
@@ -98,12 +148,102 @@ minio_client = MinioClient(
     secure=os.getenv("MINIO_SECURE", True),
 )
 
+# Shared, pooled connection to the Argo Workflows server, opened in the app lifespan
+argo_client = ArgoClient(
+    server=ARGO_SERVER,
+    token=argo_token,
+    verify_tls=VERIFY_TLS,
+    max_connections=int(os.getenv("ARGO_MAX_CONNECTIONS", 20)),
+    max_keepalive_connections=int(os.getenv("ARGO_MAX_KEEPALIVE_CONNECTIONS", 10)),
+    keepalive_expiry=float(os.getenv("ARGO_KEEPALIVE_EXPIRY", 30)),
+    timeout=float(os.getenv("ARGO_TIMEOUT", 30)),
+    connect_timeout=float(os.getenv("ARGO_CONNECT_TIMEOUT", 5)),
+)
+
+# In-memory index of workflow summaries, kept up to date from the Argo watch API
+workflow_index = WorkflowIndex(
+    argo_client,
+    namespaces=[
+        namespace.strip()
+        for namespace in os.getenv("WORKFLOW_INDEX_NAMESPACES", "argo-workflows").split(
+            ","
+        )
+        if namespace.strip()
+    ],
+    max_workflows=int(os.getenv("WORKFLOW_INDEX_MAX_WORKFLOWS", 10000)),
+    resync_interval=float(os.getenv("WORKFLOW_INDEX_RESYNC_INTERVAL", 600)),
+    subscriber_queue_size=int(os.getenv("WORKFLOW_EVENTS_QUEUE_SIZE", 1000)),
+)
+
+# Streams the logs of all pods of a workflow as one
+workflow_logs = WorkflowLogs(
+    argo_client,
+    concurrency=int(os.getenv("WORKFLOW_LOG_CONCURRENCY", 8)),
+    max_followers=int(os.getenv("WORKFLOW_LOG_MAX_FOLLOWERS", 4)),
+)
+
+# Archives the logs of finished workflows to Minio; disabled if no bucket is set
+log_archive = LogArchive(
+    minio_client,
+    argo_client,
+    workflow_index,
+    workflow_logs,
+    bucket=os.getenv("LOG_ARCHIVE_BUCKET"),
+    prefix=os.getenv("LOG_ARCHIVE_PREFIX", "workflow-logs"),
+    chunk_size=int(os.getenv("LOG_ARCHIVE_CHUNK_SIZE", 1024 * 1024)),
+    concurrency=int(os.getenv("LOG_ARCHIVE_CONCURRENCY", 2)),
+    missing_ttl=float(os.getenv("LOG_ARCHIVE_MISSING_TTL", 60)),
+)
+
+# Cache of workflow templates, revalidated against Argo after the TTL in seconds
+template_cache = WorkflowTemplateCache(
+    argo_client, ttl=float(os.getenv("WORKFLOW_TEMPLATE_CACHE_TTL", 30))
+)
+
+# Seconds between keepalive comments on idle event streams
+WORKFLOW_EVENTS_KEEPALIVE = float(os.getenv("WORKFLOW_EVENTS_KEEPALIVE", 15))
+# Seconds between status checks when waiting on a workflow outside the index
+WORKFLOW_WAIT_POLL_INTERVAL = float(os.getenv("WORKFLOW_WAIT_POLL_INTERVAL", 5))
+# Maximum number of concurrent Argo requests made by one bulk status lookup
+WORKFLOW_LOOKUP_CONCURRENCY = int(os.getenv("WORKFLOW_LOOKUP_CONCURRENCY", 10))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await argo_client.start()
+    await workflow_index.start()
+    minio_client.start_refresher()
+    await log_archive.start()
+    yield
+    await log_archive.stop()
+    minio_client.stop_refresher()
+    minio_client.shutdown_executor()
+    await workflow_index.stop()
+    await argo_client.close()
+
+
+app = FastAPI(
+    title="FRIDGE API",
+    description=description,
+    version=APP_VERSION,
+    lifespan=lifespan,
+)
+
 
 class Workflow(BaseModel):
     name: str
     namespace: str
     status: str | None = None
     created_at: str | None = None
+    fields: dict[str, Any] | None = None
+
+    @model_serializer(mode="wrap")
+    def serialize(self, handler) -> dict:
+        data = handler(self)
+        # Only present when a projection of fields was requested
+        if self.fields is None:
+            data.pop("fields", None)
+        return data
 
 
 class WorkflowTemplate(BaseModel):
@@ -112,33 +252,83 @@ class WorkflowTemplate(BaseModel):
     parameters: list[dict] | None = None
 
 
-def parse_argo_error(response: dict) -> dict | None:
+class WorkflowPage(BaseModel):
+    workflows: list[Workflow] | list[dict]
+    next_cursor: str | None = None
+
+
+class WorkflowWait(BaseModel):
+    completed: bool
+    workflow: Workflow
+
+
+class WorkflowRef(BaseModel):
+    namespace: str
+    name: str
+
+
+class WorkflowLookup(BaseModel):
+    workflows: list[WorkflowRef] = Field(max_length=1000)
+
+
+class WorkflowLookupResult(BaseModel):
+    namespace: str
+    name: str
+    workflow: Workflow | None = None
+    error: Any = None
+
+
+# Fields of an Argo workflow needed to build a Workflow summary
+WORKFLOW_SUMMARY_FIELDS = [
+    "metadata.name",
+    "metadata.namespace",
+    "metadata.creationTimestamp",
+    "status.phase",
+]
+
+
+def parse_fields(fields: str | None) -> list[str]:
+    """
+    Parse a comma-separated list of dotted workflow field paths, e.g. `status.startedAt`.
+    """
+    if not fields:
+        return []
+    paths = [field.strip() for field in fields.split(",") if field.strip()]
+    for path in paths:
+        if not re.fullmatch(r"[A-Za-z0-9_-]+(\.[A-Za-z0-9_-]+)*", path):
+            raise HTTPException(status_code=400, detail=f"Invalid field: {path}")
+    return paths
+
+
+def argo_fields(fields: list[str], list_response: bool) -> str:
     """
-    Check for errors in the Argo Workflows response and return those errors if any.
+    Build the Argo `fields` query parameter so that Argo only returns the parts of
+    each workflow needed for a summary, plus any extra fields requested.
     """
+    paths = WORKFLOW_SUMMARY_FIELDS + fields
+    if list_response:
+        return ",".join(
+            ["metadata.continue", "metadata.resourceVersion"]
+            + [f"items.{path}" for path in paths]
+        )
+    return ",".join(paths + ["metadata.resourceVersion"])
 
-    match response.get("code"):
-        case 7:
-            return {
-                "error": "Namespace not found or not permitted.",
-                "argo_status_code": response["code"],
-                "message": response["message"],
-            }
-        case 5:
-            if "workflowtemplates" in response["message"]:
-                missing_resource = "Workflow template"
-            else:
-                missing_resource = "Workflow"
-            return {
-                "error": f"{missing_resource} not found.",
-                "argo_status_code": response["code"],
-                "response": response["message"],
-            }
-        case None:
-            pass
 
+def select_field(item: dict, path: str) -> Any:
+    """
+    Look up a dotted field path in an Argo object, returning None if it is not set.
+    """
+    value = item
+    for key in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
 
-def extract_argo_workflows(response: dict) -> list[Workflow] | Workflow | dict:
+
+def extract_argo_workflows(
+    response: dict, fields: list[str] | None = None
+) -> list[Workflow] | Workflow | dict:
     """
     Parse the Argo response to extract workflow information.
     """
@@ -152,6 +342,11 @@ def extract_argo_workflows(response: dict) -> list[Workflow] | Workflow | dict:
                 namespace=item.get("metadata", {}).get("namespace"),
                 status=item.get("status", {}).get("phase"),
                 created_at=item.get("metadata", {}).get("creationTimestamp"),
+                fields=(
+                    {path: select_field(item, path) for path in fields}
+                    if fields
+                    else None
+                ),
             )
             workflows.append(workflow)
         return workflows
@@ -161,10 +356,42 @@ def extract_argo_workflows(response: dict) -> list[Workflow] | Workflow | dict:
             namespace=response.get("metadata", {}).get("namespace"),
             status=response.get("status", {}).get("phase"),
             created_at=response.get("metadata", {}).get("creationTimestamp"),
+            fields=(
+                {path: select_field(response, path) for path in fields}
+                if fields
+                else None
+            ),
         )
         return workflow
 
 
+def workflow_from_summary(summary: WorkflowSummary) -> Workflow:
+    """
+    Build a Workflow from a summary held in the workflow index.
+    """
+    return Workflow(
+        name=summary.name,
+        namespace=summary.namespace,
+        status=summary.phase,
+        created_at=summary.created_at,
+    )
+
+
+async def fetch_workflow(namespace: str, workflow_name: str) -> Workflow:
+    """
+    Fetch the summary of a single workflow from Argo.
+    """
+    r = await argo_client.get(
+        f"/api/v1/workflows/{namespace}/{workflow_name}",
+        params={"fields": argo_fields([], list_response=False)},
+    )
+    if r.status_code != 200:
+        raise HTTPException(
+            status_code=r.status_code, detail=parse_argo_error(r.json())
+        )
+    return extract_argo_workflows(r.json())
+
+
 def extract_argo_workflow_templates(
     response: dict,
 ) -> list[WorkflowTemplate] | WorkflowTemplate | dict:
@@ -196,6 +423,370 @@ def extract_argo_workflow_templates(
         return workflow
 
 
+def make_etag(resource_version: str | None, request: Request) -> str | None:
+    """
+    Build a weak ETag from an Argo resourceVersion. The query parameters are
+    hashed into the tag, since the same resource is returned in different
+    representations depending on options such as `verbose` and `fields`.
+    """
+    if not resource_version:
+        return None
+    variant = hashlib.sha256(
+        repr(sorted(request.query_params.multi_items())).encode()
+    ).hexdigest()[:12]
+    return f'W/"{resource_version}-{variant}"'
+
+
+def not_modified(
+    request: Request,
+    response: Response,
+    resource_version: str | None,
+    if_none_match: str | None,
+) -> Response | None:
+    """
+    Handle a conditional GET. Returns a 304 response if the client's
+    If-None-Match header matches the current ETag, otherwise sets the ETag on
+    the response and returns None.
+    """
+    etag = make_etag(resource_version, request)
+    if etag is None:
+        return None
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if if_none_match:
+        # Weak comparison, as for GET requests in RFC 9110
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if "*" in tags or etag.removeprefix("W/") in tags:
+            return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
+def encode_cursor(continue_token: str | None) -> str | None:
+    """
+    Wrap an Argo continue token in an opaque cursor for the next page of results.
+    """
+    if not continue_token:
+        return None
+    return base64.urlsafe_b64encode(
+        json.dumps({"continue": continue_token}).encode()
+    ).decode()
+
+
+def decode_cursor(cursor: str) -> str:
+    """
+    Recover the Argo continue token from a cursor returned by a previous page.
+    """
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode()))["continue"]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def workflow_filters(
+    phases: list[str] | None, template: str | None, label_selector: str | None
+) -> tuple[list[LabelRequirement], str | None]:
+    """
+    Validate the workflow list filters, returning the parsed label selector and an
+    Argo label selector combining it with the phase and template filters, which
+    Argo records as labels on each workflow.
+    """
+    try:
+        selector = parse_label_selector(label_selector)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if template is not None and not re.fullmatch(LABEL_VALUE, template):
+        raise HTTPException(status_code=400, detail=f"Invalid template: {template}")
+
+    requirements = [label_selector.strip()] if selector else []
+    if phases:
+        requirements.append(f"{WORKFLOW_PHASE_LABEL} in ({','.join(phases)})")
+    if template:
+        requirements.append(f"{WORKFLOW_TEMPLATE_LABEL}={template}")
+    return selector, ",".join(requirements) or None
+
+
+def format_timestamp(timestamp: datetime | None) -> str | None:
+    """
+    Format a datetime as a Kubernetes RFC 3339 timestamp, assuming UTC if it has no
+    timezone, so that it can be compared with workflow creation timestamps.
+    """
+    if timestamp is None:
+        return None
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def filter_created(
+    items: list[dict], created_after: str | None, created_before: str | None
+) -> list[dict]:
+    """
+    Filter Argo workflows by creation time, which Argo cannot do server side.
+    """
+    if not (created_after or created_before):
+        return items
+    return [
+        item
+        for item in items
+        if (created := item.get("metadata", {}).get("creationTimestamp") or "")
+        and (not created_after or created >= created_after)
+        and (not created_before or created < created_before)
+    ]
+
+
+def sse_event(event: dict) -> str:
+    """
+    Format an event as a Server-Sent Events message.
+    """
+    message = f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+    if event.get("resource_version"):
+        message = f"id: {event['resource_version']}\n" + message
+    return message
+
+
+def format_log_entry(entry: dict, output_format: str) -> str:
+    """
+    Format a parsed log line as plain text, an NDJSON line or a Server-Sent Event.
+    """
+    if output_format == "text":
+        # Lines merged from several pods are prefixed with the node they came from
+        prefix = f"[{entry['node']}] " if "node" in entry else ""
+        if "error" in entry:
+            return f"{prefix}Error streaming log: {entry['error']}\n"
+        if "timestamp" in entry:
+            return f"{entry['timestamp']} {prefix}{entry['content']}\n"
+        return prefix + entry["content"] + "\n"
+    data = json.dumps(entry)
+    if output_format == "sse":
+        return f"event: {'error' if 'error' in entry else 'log'}\ndata: {data}\n\n"
+    return data + "\n"
+
+
+async def with_keepalive(iterator: AsyncIterator, interval: float | None):
+    """
+    Yield the items of an async iterator, and None whenever `interval` seconds pass
+    without a new item. The pending read is left running rather than cancelled,
+    so no data is lost.
+    """
+    pending = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(anext(iterator))
+            done, _ = await asyncio.wait({pending}, timeout=interval)
+            if not done:
+                yield None
+                continue
+            task, pending = pending, None
+            try:
+                item = task.result()
+            except StopAsyncIteration:
+                return
+            yield item
+    finally:
+        if pending is not None:
+            pending.cancel()
+            await asyncio.gather(pending, return_exceptions=True)
+
+
+async def stream_log(
+    r: httpx.Response,
+    output_format: str,
+    timestamps: bool = False,
+    keepalive: float | None = None,
+):
+    """
+    Convert a streamed Argo log response into the chosen output format one line at
+    a time, so that only the line being forwarded is held in memory.
+    An error reported by Argo part way through is sent as the last line.
+    """
+    lines = r.aiter_lines()
+    if keepalive is not None:
+        # Only SSE needs keepalives; the other formats read lines directly to
+        # avoid the cost of a task per line
+        lines = with_keepalive(lines, keepalive)
+    try:
+        async for line in lines:
+            if line is None:
+                yield ": keepalive\n\n"
+                continue
+            if not line:
+                continue
+            entry = parse_log_line(line, timestamps)
+            yield format_log_entry(entry, output_format)
+            if "error" in entry:
+                break
+    except httpx.HTTPError as e:
+        yield format_log_entry({"error": str(e)}, output_format)
+    finally:
+        if keepalive is not None:
+            # Cancel any read the keepalive wrapper is waiting on
+            await lines.aclose()
+        await r.aclose()
+
+
+async def find_archived_log(
+    namespace: str,
+    workflow_name: str,
+    pod_name: str,
+    container_name: str,
+    source: str,
+    follow: bool,
+) -> dict | None:
+    """
+    Find a pod's log in the log archive, if it should be read from there.
+    Returns the pod's entry in the archive index, or None to read the live log.
+    """
+    if source == "live":
+        return None
+    if source == "archive" and follow:
+        raise HTTPException(status_code=400, detail="Archived logs cannot be followed")
+    if follow or not log_archive.enabled:
+        if source == "archive":
+            raise HTTPException(status_code=404, detail="Log archiving is not enabled")
+        return None
+    # Workflows the index knows to be running cannot have been archived yet
+    summary = workflow_index.get(namespace, workflow_name)
+    if (
+        source == "auto"
+        and summary is not None
+        and summary.phase not in TERMINAL_PHASES
+    ):
+        return None
+
+    index = await log_archive.load_index(namespace, workflow_name)
+    pod = None
+    if index is not None and index["container"] == container_name:
+        pod = log_archive.find_pod(index, pod_name)
+    if pod is None and source == "archive":
+        raise HTTPException(status_code=404, detail="Log is not archived")
+    return pod
+
+
+async def stream_archived_log(
+    pod: dict,
+    output_format: str,
+    timestamps: bool = False,
+    start_line: int | None = None,
+    end_line: int | None = None,
+    tail_lines: int | None = None,
+    since_seconds: int | None = None,
+    limit_bytes: int | None = None,
+):
+    """
+    Stream lines of an archived pod log, decompressing only the chunks needed.
+    """
+    start = start_line or 0
+    if tail_lines is not None:
+        end = pod["lines"] if end_line is None else min(end_line, pod["lines"])
+        start = max(start, end - tail_lines)
+    since = None
+    if since_seconds is not None:
+        # Compared at full precision, so lines in the cutoff second are neither
+        # all kept nor all dropped
+        since = timestamp_key(
+            (datetime.now(timezone.utc) - timedelta(seconds=since_seconds)).strftime(
+                "%Y-%m-%dT%H:%M:%S.%fZ"
+            )
+        )
+        start = max(start, log_archive.first_line_since(pod, since))
+
+    sent = 0
+    async for line in log_archive.read_lines(pod, start, end_line):
+        timestamp, _, content = line.partition(" ")
+        if since is not None and timestamp_key(timestamp) < since:
+            continue
+        sent += len(content.encode()) + 1
+        if limit_bytes is not None and sent > limit_bytes:
+            break
+        entry = {"pod_name": pod["pod_name"], "content": content}
+        if timestamps:
+            entry["timestamp"] = timestamp
+        yield format_log_entry(entry, output_format)
+    if pod.get("error"):
+        yield format_log_entry({"error": pod["error"]}, output_format)
+
+
+def archived_log_range(pod: dict, range_header: str) -> StreamingResponse:
+    """
+    Serve a byte range of an archived pod log, as stored with a timestamp at the
+    start of each line.
+    """
+    byte_range = parse_range(range_header, pod["bytes"])
+    if byte_range is None:
+        start, end = 0, pod["bytes"] - 1
+        status_code, headers = 200, {}
+    else:
+        start, end = byte_range
+        status_code = 206
+        headers = {"Content-Range": f"bytes {start}-{end}/{pod['bytes']}"}
+    headers.update(
+        {"Accept-Ranges": "bytes", "Content-Length": str(max(end - start + 1, 0))}
+    )
+    return StreamingResponse(
+        log_archive.read_bytes(pod, start, end),
+        status_code=status_code,
+        media_type=LOG_MEDIA_TYPES["text"],
+        headers=headers,
+    )
+
+
+# Media types of the log output formats
+LOG_MEDIA_TYPES = {
+    "text": "text/plain; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+
+async def live_log_entries(r: httpx.Response, timestamps: bool = False):
+    """Yield the parsed lines of a streamed Argo log response, then close it."""
+    try:
+        async for line in r.aiter_lines():
+            if line:
+                yield parse_log_line(line, timestamps)
+    except httpx.HTTPError as e:
+        yield {"error": str(e)}
+    finally:
+        await r.aclose()
+
+
+async def archived_log_entries(pod: dict, timestamps: bool = False):
+    """Yield the lines of an archived pod log as parsed log entries."""
+    async for line in log_archive.read_lines(pod):
+        timestamp, _, content = line.partition(" ")
+        entry = {"pod_name": pod["pod_name"], "content": content}
+        if timestamps:
+            entry["timestamp"] = timestamp
+        yield entry
+    if pod.get("error"):
+        yield {"error": pod["error"]}
+
+
+async def stream_search_results(
+    results: AsyncIterator[dict], output_format: str, context: int
+):
+    """
+    Format log search results. Plain text follows grep: each line is prefixed with
+    its line number and `:` for matches or `-` for context, and `--` separates
+    groups of lines that are not contiguous.
+    """
+    previous = None
+    try:
+        async for entry in results:
+            if output_format != "text" or "error" in entry:
+                yield format_log_entry(entry, output_format)
+                continue
+            if context and previous is not None and entry["line"] > previous + 1:
+                yield "--\n"
+            previous = entry["line"]
+            separator = ":" if entry["match"] else "-"
+            timestamp = f"{entry['timestamp']} " if "timestamp" in entry else ""
+            yield f"{entry['line']}{separator}{timestamp}{entry['content']}\n"
+    finally:
+        await results.aclose()
+
+
 def parse_parameters(parameters: list[dict]) -> list[str]:
     """
     Parse the parameters from the workflow template into a list of strings.
@@ -228,28 +819,193 @@ def verify_request(credentials: HTTPBasicCredentials = Depends(security)) -> boo
     return True
 
 
+@app.get("/status", tags=["Status"])
+async def get_status(
+    verified: Annotated[bool, "Verify the request with basic auth"] = Depends(
+        verify_request
+    ),
+) -> dict:
+    return {
+        "version": APP_VERSION,
+        "argo_token": (
+            argo_sa_token.status()
+            if os.getenv("KUBERNETES_SERVICE_HOST")
+            else {"source": "ARGO_TOKEN environment variable"}
+        ),
+        "minio": minio_client.status(),
+        "workflow_index": workflow_index.status(),
+        "log_archive": log_archive.status(),
+        "template_cache": template_cache.status(),
+    }
+
+
 @app.get("/workflows/{namespace}", tags=["Argo Workflows"])
 async def get_workflows(
+    request: Request,
+    response: Response,
     namespace: Annotated[str, "The namespace to list workflows from"],
     verbose: Annotated[
         bool, "Return verbose output - full details of all workflows"
     ] = False,
+    limit: Annotated[
+        int | None,
+        Query(ge=1, le=1000, description="Maximum number of workflows to return"),
+    ] = None,
+    cursor: Annotated[
+        str | None,
+        Query(description="Cursor from a previous page to continue listing from"),
+    ] = None,
+    fields: Annotated[
+        str | None,
+        Query(
+            description="Extra comma-separated fields to return, e.g. status.startedAt"
+        ),
+    ] = None,
+    phase: Annotated[
+        list[Literal["Pending", "Running", "Succeeded", "Failed", "Error"]] | None,
+        Query(description="Only return workflows in these phases"),
+    ] = None,
+    label_selector: Annotated[
+        str | None,
+        Query(description="Kubernetes label selector, e.g. team=data,tier!=test"),
+    ] = None,
+    template: Annotated[
+        str | None,
+        Query(description="Only return workflows submitted from this template"),
+    ] = None,
+    created_after: Annotated[
+        datetime | None,
+        Query(description="Only return workflows created at or after this time"),
+    ] = None,
+    created_before: Annotated[
+        datetime | None,
+        Query(description="Only return workflows created before this time"),
+    ] = None,
+    if_none_match: Annotated[str | None, Header(alias="If-None-Match")] = None,
     verified: Annotated[bool, "Verify the request with basic auth"] = Depends(
         verify_request
     ),
-) -> list[Workflow] | Workflow | dict:
-    r = requests.get(
-        f"{ARGO_SERVER}/api/v1/workflows/{namespace}",
-        verify=VERIFY_TLS,
-        headers={"Authorization": f"Bearer {argo_token()}"},
-    )
+) -> list[Workflow] | Workflow | WorkflowPage | dict:
+    extra_fields = parse_fields(fields)
+    selector, argo_selector = workflow_filters(phase, template, label_selector)
+    after = format_timestamp(created_after)
+    before = format_timestamp(created_before)
+    # Plain listings of indexed namespaces are answered from memory
+    if not (verbose or extra_fields or limit or cursor) and workflow_index.ready(
+        namespace
+    ):
+        if cached := not_modified(
+            request,
+            response,
+            workflow_index.resource_version(namespace),
+            if_none_match,
+        ):
+            return cached
+        summaries = workflow_index.list_workflows(
+            namespace,
+            phases=phase,
+            template=template,
+            selector=selector,
+            created_after=after,
+            created_before=before,
+        )
+        if not summaries:
+            return {"message": "No workflows found in the specified namespace."}
+        return [workflow_from_summary(summary) for summary in summaries]
+
+    # Phase, template and label filters are applied by Argo; the creation time
+    # window is applied to the workflows Argo returns
+    params = {}
+    if limit is not None:
+        params["listOptions.limit"] = limit
+    if cursor is not None:
+        params["listOptions.continue"] = decode_cursor(cursor)
+    paged = bool(params)
+    if argo_selector:
+        params["listOptions.labelSelector"] = argo_selector
+    if not verbose:
+        # Only ask Argo for the fields needed, rather than full workflow objects
+        params["fields"] = argo_fields(extra_fields, list_response=True)
+    r = await argo_client.get(f"/api/v1/workflows/{namespace}", params=params)
     if r.status_code != 200:
         raise HTTPException(
             status_code=r.status_code, detail=parse_argo_error(r.json())
         )
-    if verbose:
-        return r.json()
-    return extract_argo_workflows(r.json())
+    json_data = r.json()
+    if cached := not_modified(
+        request,
+        response,
+        json_data.get("metadata", {}).get("resourceVersion"),
+        if_none_match,
+    ):
+        return cached
+    items = filter_created(json_data.get("items") or [], after, before)
+    if not paged:
+        if verbose:
+            return {**json_data, "items": items} if after or before else json_data
+        return extract_argo_workflows({"items": items}, extra_fields)
+
+    # Paged listing: Argo returns workflows in a stable order, with a continue
+    # token that resumes from the last item of this page. Pages filtered by
+    # creation time may hold fewer than `limit` workflows.
+    return WorkflowPage(
+        workflows=(
+            items
+            if verbose or not items
+            else extract_argo_workflows({"items": items}, extra_fields)
+        ),
+        next_cursor=encode_cursor(json_data.get("metadata", {}).get("continue")),
+    )
+
+
+@app.get("/workflowevents/{namespace}", tags=["Argo Workflows"])
+async def stream_workflow_events(
+    request: Request,
+    namespace: Annotated[str, "The namespace to stream workflow events from"],
+    workflow: Annotated[
+        list[str] | None,
+        Query(description="Only stream events for these workflows"),
+    ] = None,
+    verified: Annotated[bool, "Verify the request with basic auth"] = Depends(
+        verify_request
+    ),
+) -> StreamingResponse:
+    """
+    Stream workflow phase and node transitions as Server-Sent Events.
+    Events come from the workflow index's shared watch, so only indexed
+    namespaces can be streamed.
+    """
+    if namespace not in workflow_index.indexes:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Workflow events are not available for namespace {namespace}",
+        )
+    subscription = workflow_index.subscribe(namespace, workflow)
+
+    async def events():
+        try:
+            # Start with the current phase of the requested workflows
+            for name in workflow or []:
+                summary = workflow_index.get(namespace, name)
+                if summary is not None:
+                    yield sse_event(workflow_event("phase", summary))
+            while not await request.is_disconnected():
+                event = await subscription.get(timeout=WORKFLOW_EVENTS_KEEPALIVE)
+                if event is None:
+                    yield ": keepalive\n\n"
+                    continue
+                yield sse_event(event)
+                if event["type"] == "lagged":
+                    # The client fell too far behind; it should reconnect
+                    break
+        finally:
+            workflow_index.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.get("/workflows/{namespace}/{workflow_name}/log", tags=["Argo Workflows"])
@@ -258,81 +1014,547 @@ async def get_workflow_log(
     workflow_name: str,
     pod_name: str | None = None,
     container_name: str = "main",
+    output_format: Annotated[
+        Literal["text", "ndjson", "sse"],
+        Query(
+            alias="format",
+            description="Plain text lines, one JSON object per line, or Server-Sent Events",
+        ),
+    ] = "text",
+    follow: Annotated[
+        bool, Query(description="Keep streaming new lines until the pod finishes")
+    ] = False,
+    tail_lines: Annotated[
+        int | None, Query(ge=0, description="Only return the last lines of the log")
+    ] = None,
+    since_seconds: Annotated[
+        int | None,
+        Query(ge=1, description="Only return lines from the last number of seconds"),
+    ] = None,
+    limit_bytes: Annotated[
+        int | None,
+        Query(ge=1, description="Stop after returning this many bytes of log"),
+    ] = None,
+    timestamps: Annotated[
+        bool, Query(description="Include the timestamp of each line")
+    ] = False,
+    source: Annotated[
+        Literal["auto", "live", "archive"],
+        Query(
+            description="Read the log from Argo, from the log archive, or from the archive if it has been archived"
+        ),
+    ] = "auto",
+    start_line: Annotated[
+        int | None,
+        Query(ge=0, description="First line to return, for archived logs"),
+    ] = None,
+    end_line: Annotated[
+        int | None,
+        Query(ge=0, description="Line to stop before, for archived logs"),
+    ] = None,
+    range_header: Annotated[str | None, Header(alias="Range")] = None,
     verified: Annotated[bool, "Verify the request with basic auth"] = Depends(
         verify_request
     ),
-):
+) -> StreamingResponse:
+    """
+    Stream the log of a workflow pod as it is read from Argo, without buffering it,
+    or from the log archive once the workflow has finished and been archived.
+    """
+    archived = await find_archived_log(
+        namespace,
+        workflow_name,
+        pod_name or workflow_name,
+        container_name,
+        source,
+        follow,
+    )
+    if archived is not None:
+        if range_header:
+            return archived_log_range(archived, range_header)
+        return StreamingResponse(
+            stream_archived_log(
+                archived,
+                output_format,
+                timestamps=timestamps,
+                start_line=start_line,
+                end_line=end_line,
+                tail_lines=tail_lines,
+                since_seconds=since_seconds,
+                limit_bytes=limit_bytes,
+            ),
+            media_type=LOG_MEDIA_TYPES[output_format],
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+    if start_line is not None or end_line is not None or range_header:
+        raise HTTPException(
+            status_code=400,
+            detail="Line and byte ranges are only available for archived logs",
+        )
+
     params = {
         "podName": pod_name or workflow_name,
         "logOptions.container": container_name,
     }
-
-    r = requests.get(
-        f"{ARGO_SERVER}/api/v1/workflows/{namespace}/{workflow_name}/log",
-        verify=VERIFY_TLS,
-        headers={"Authorization": f"Bearer {argo_token()}"},
+    if follow:
+        params["logOptions.follow"] = "true"
+    if tail_lines is not None:
+        params["logOptions.tailLines"] = tail_lines
+    if since_seconds is not None:
+        params["logOptions.sinceSeconds"] = since_seconds
+    if limit_bytes is not None:
+        params["logOptions.limitBytes"] = limit_bytes
+    if timestamps:
+        params["logOptions.timestamps"] = "true"
+    r = await argo_client.open_stream(
+        "GET",
+        f"/api/v1/workflows/{namespace}/{workflow_name}/log",
         params=params,
-        stream=True,
+        # A followed log may go quiet for a long time without having finished
+        read_timeout=not follow,
     )
     if r.status_code != 200:
+        await r.aread()
+        await r.aclose()
         raise HTTPException(
             status_code=r.status_code, detail=parse_argo_error(r.json())
         )
 
-    lines = []
-    for line in r.iter_lines():
-        if line:
-            parsed = json.loads(line)
-            if "result" in parsed:
-                lines.append(parsed["result"].get("content", ""))
-    return {"podName": workflow_name, "log": "\n".join(lines)}
+    return StreamingResponse(
+        stream_log(
+            r,
+            output_format,
+            timestamps=timestamps,
+            keepalive=WORKFLOW_EVENTS_KEEPALIVE if output_format == "sse" else None,
+        ),
+        media_type=LOG_MEDIA_TYPES[output_format],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Also close the Argo stream if the client disconnects before it is read
+        background=BackgroundTask(r.aclose),
+    )
+
+
+@app.get("/workflows/{namespace}/{workflow_name}/log/search", tags=["Argo Workflows"])
+async def search_workflow_log(
+    namespace: str,
+    workflow_name: str,
+    pattern: Annotated[str, Query(description="Text or regular expression to find")],
+    pod_name: str | None = None,
+    container_name: str = "main",
+    regex: Annotated[
+        bool, Query(description="Treat the pattern as a regular expression")
+    ] = False,
+    ignore_case: Annotated[
+        bool, Query(description="Ignore case when matching")
+    ] = False,
+    context: Annotated[
+        int,
+        Query(ge=0, le=100, description="Lines to return before and after each match"),
+    ] = 0,
+    max_matches: Annotated[
+        int,
+        Query(ge=1, le=10000, description="Stop searching after this many matches"),
+    ] = 100,
+    output_format: Annotated[
+        Literal["text", "ndjson", "sse"],
+        Query(
+            alias="format",
+            description="grep-style text lines, one JSON object per line, or Server-Sent Events",
+        ),
+    ] = "text",
+    timestamps: Annotated[
+        bool, Query(description="Include the timestamp of each line")
+    ] = False,
+    source: Annotated[
+        Literal["auto", "live", "archive"],
+        Query(
+            description="Search the log from Argo, from the log archive, or from the archive if it has been archived"
+        ),
+    ] = "auto",
+    verified: Annotated[bool, "Verify the request with basic auth"] = Depends(
+        verify_request
+    ),
+) -> StreamingResponse:
+    """
+    Search a workflow pod's log on the server and stream only the matching lines,
+    with their line numbers and optional context lines. The log is read one line
+    at a time and reading stops once `max_matches` lines have been found.
+    """
+    try:
+        matches = compile_matcher(pattern, regex=regex, ignore_case=ignore_case)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    archived = await find_archived_log(
+        namespace,
+        workflow_name,
+        pod_name or workflow_name,
+        container_name,
+        source,
+        follow=False,
+    )
+    r = None
+    if archived is not None:
+        entries = archived_log_entries(archived, timestamps)
+    else:
+        params = {
+            "podName": pod_name or workflow_name,
+            "logOptions.container": container_name,
+        }
+        if timestamps:
+            params["logOptions.timestamps"] = "true"
+        r = await argo_client.open_stream(
+            "GET",
+            f"/api/v1/workflows/{namespace}/{workflow_name}/log",
+            params=params,
+        )
+        if r.status_code != 200:
+            await r.aread()
+            await r.aclose()
+            raise HTTPException(
+                status_code=r.status_code, detail=parse_argo_error(r.json())
+            )
+        entries = live_log_entries(r, timestamps)
+
+    async def close() -> None:
+        # Stop reading the log once the search ends early or the client disconnects
+        await entries.aclose()
+        if r is not None:
+            await r.aclose()
+
+    results = search_log(entries, matches, context=context, max_matches=max_matches)
+    return StreamingResponse(
+        stream_search_results(results, output_format, context),
+        media_type=LOG_MEDIA_TYPES[output_format],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(close),
+    )
+
+
+@app.get("/workflows/{namespace}/{workflow_name}/log/archive", tags=["Argo Workflows"])
+async def get_log_archive(
+    namespace: str,
+    workflow_name: str,
+    verified: Annotated[bool, "Verify the request with basic auth"] = Depends(
+        verify_request
+    ),
+) -> dict:
+    """
+    Return the archive index of a workflow's logs, listing the archived pods with
+    their line and byte counts.
+    """
+    if not log_archive.enabled:
+        raise HTTPException(status_code=404, detail="Log archiving is not enabled")
+    index = await log_archive.load_index(namespace, workflow_name)
+    if index is None:
+        raise HTTPException(status_code=404, detail="Workflow logs are not archived")
+    return index
+
+
+@app.post("/workflows/{namespace}/{workflow_name}/log/archive", tags=["Argo Workflows"])
+async def archive_workflow_log(
+    namespace: str,
+    workflow_name: str,
+    verified: Annotated[bool, "Verify the request with basic auth"] = Depends(
+        verify_request
+    ),
+) -> dict:
+    """
+    Archive the logs of a finished workflow now, replacing any existing archive.
+    """
+    if not log_archive.enabled:
+        raise HTTPException(status_code=404, detail="Log archiving is not enabled")
+    r = await argo_client.get(
+        f"/api/v1/workflows/{namespace}/{workflow_name}",
+        params={"fields": f"{POD_FIELDS},status.phase"},
+    )
+    if r.status_code != 200:
+        raise HTTPException(
+            status_code=r.status_code, detail=parse_argo_error(r.json())
+        )
+    workflow = r.json()
+    if workflow.get("status", {}).get("phase") not in TERMINAL_PHASES:
+        raise HTTPException(
+            status_code=409, detail="Only finished workflows can be archived"
+        )
+    return await log_archive.archive(namespace, workflow_name, workflow_pods(workflow))
+
+
+@app.get("/workflows/{namespace}/{workflow_name}/logs", tags=["Argo Workflows"])
+async def get_workflow_logs(
+    namespace: str,
+    workflow_name: str,
+    container_name: str = "main",
+    output_format: Annotated[
+        Literal["text", "ndjson", "sse"],
+        Query(
+            alias="format",
+            description="Plain text lines, one JSON object per line, or Server-Sent Events",
+        ),
+    ] = "text",
+    follow: Annotated[
+        bool, Query(description="Keep streaming new lines until the pods finish")
+    ] = False,
+    tail_lines: Annotated[
+        int | None,
+        Query(ge=0, description="Only return the last lines of each pod's log"),
+    ] = None,
+    since_seconds: Annotated[
+        int | None,
+        Query(ge=1, description="Only return lines from the last number of seconds"),
+    ] = None,
+    limit_bytes: Annotated[
+        int | None,
+        Query(ge=1, description="Stop after this many bytes of each pod's log"),
+    ] = None,
+    timestamps: Annotated[
+        bool, Query(description="Include the timestamp of each line")
+    ] = False,
+    verified: Annotated[bool, "Verify the request with basic auth"] = Depends(
+        verify_request
+    ),
+) -> StreamingResponse:
+    """
+    Stream the logs of all pods of a workflow, merged in timestamp order, with each
+    line labelled with the node it came from. With `follow`, lines are sent in
+    the order they arrive.
+    """
+    r = await argo_client.get(
+        f"/api/v1/workflows/{namespace}/{workflow_name}",
+        params={"fields": POD_FIELDS},
+    )
+    if r.status_code != 200:
+        raise HTTPException(
+            status_code=r.status_code, detail=parse_argo_error(r.json())
+        )
+    pods = workflow_pods(r.json())
+    if follow and not workflow_logs.can_follow():
+        raise HTTPException(
+            status_code=503,
+            detail="Too many workflow logs are being followed; try again later",
+        )
+
+    async def logs():
+        entries = workflow_logs.stream(
+            namespace,
+            workflow_name,
+            pods,
+            container=container_name,
+            follow=follow,
+            tail_lines=tail_lines,
+            since_seconds=since_seconds,
+            limit_bytes=limit_bytes,
+        )
+        results = entries
+        if output_format == "sse":
+            results = with_keepalive(entries, WORKFLOW_EVENTS_KEEPALIVE)
+        try:
+            async for entry in results:
+                if entry is None:
+                    yield ": keepalive\n\n"
+                    continue
+                if not timestamps:
+                    entry.pop("timestamp", None)
+                yield format_log_entry(entry, output_format)
+        finally:
+            # Stop reading the pod logs if the client disconnects. The keepalive
+            # wrapper may be waiting on the entries, so it is closed first
+            if results is not entries:
+                await results.aclose()
+            await entries.aclose()
+
+    return StreamingResponse(
+        logs(),
+        media_type=LOG_MEDIA_TYPES[output_format],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/workflows/{namespace}/{workflow_name}/wait", tags=["Argo Workflows"])
+async def wait_for_workflow(
+    namespace: Annotated[str, "The namespace of the workflow"],
+    workflow_name: Annotated[str, "The name of the workflow to wait for"],
+    timeout: Annotated[
+        float,
+        Query(ge=0, le=3600, description="Maximum number of seconds to wait"),
+    ] = 60,
+    verified: Annotated[bool, "Verify the request with basic auth"] = Depends(
+        verify_request
+    ),
+) -> WorkflowWait:
+    """
+    Wait until a workflow finishes or the timeout passes, then return its summary.
+    `completed` is false if the workflow was still running when the timeout passed.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+
+    if namespace not in workflow_index.indexes:
+        # Namespaces outside the index have no shared watch, so poll Argo
+        while True:
+            workflow = await fetch_workflow(namespace, workflow_name)
+            remaining = deadline - loop.time()
+            if workflow.status in TERMINAL_PHASES or remaining <= 0:
+                return WorkflowWait(
+                    completed=workflow.status in TERMINAL_PHASES, workflow=workflow
+                )
+            await asyncio.sleep(min(WORKFLOW_WAIT_POLL_INTERVAL, remaining))
+
+    # Subscribe before checking the current phase, so no transition is missed
+    subscription = workflow_index.subscribe(
+        namespace, [workflow_name], event_types={"phase", "deleted"}
+    )
+    try:
+        while True:
+            summary = workflow_index.get(namespace, workflow_name)
+            # A workflow that was just submitted may not be in the index yet
+            workflow = (
+                workflow_from_summary(summary)
+                if summary is not None
+                else await fetch_workflow(namespace, workflow_name)
+            )
+            remaining = deadline - loop.time()
+            if workflow.status in TERMINAL_PHASES or remaining <= 0:
+                return WorkflowWait(
+                    completed=workflow.status in TERMINAL_PHASES, workflow=workflow
+                )
+            event = await subscription.get(timeout=remaining)
+            if event is None:
+                continue
+            if event["type"] == "deleted":
+                raise HTTPException(status_code=404, detail="Workflow was deleted.")
+            if event["type"] == "lagged":
+                workflow_index.unsubscribe(subscription)
+                subscription = workflow_index.subscribe(
+                    namespace, [workflow_name], event_types={"phase", "deleted"}
+                )
+    finally:
+        workflow_index.unsubscribe(subscription)
 
 
 @app.get("/workflows/{namespace}/{workflow_name}", tags=["Argo Workflows"])
 async def get_single_workflow(
+    request: Request,
+    response: Response,
     namespace: Annotated[str, "The namespace to list workflows from"],
     workflow_name: Annotated[str, "The name of the workflow to retrieve"],
     verbose: Annotated[
         bool, "Return verbose output - full details of the workflow"
     ] = False,
+    fields: Annotated[
+        str | None,
+        Query(
+            description="Extra comma-separated fields to return, e.g. status.startedAt"
+        ),
+    ] = None,
+    if_none_match: Annotated[str | None, Header(alias="If-None-Match")] = None,
     verified: Annotated[bool, "Verify the request with basic auth"] = Depends(
         verify_request
     ),
 ) -> list[Workflow] | Workflow | dict:
-    r = requests.get(
-        f"{ARGO_SERVER}/api/v1/workflows/{namespace}/{workflow_name}",
-        verify=VERIFY_TLS,
-        headers={"Authorization": f"Bearer {argo_token()}"},
+    extra_fields = parse_fields(fields)
+    if not (verbose or extra_fields):
+        summary = workflow_index.get(namespace, workflow_name)
+        if summary is not None:
+            if cached := not_modified(
+                request, response, summary.resource_version, if_none_match
+            ):
+                return cached
+            return workflow_from_summary(summary)
+
+    params = {}
+    if not verbose:
+        params["fields"] = argo_fields(extra_fields, list_response=False)
+    r = await argo_client.get(
+        f"/api/v1/workflows/{namespace}/{workflow_name}", params=params
     )
     if r.status_code != 200:
         raise HTTPException(
             status_code=r.status_code, detail=parse_argo_error(r.json())
         )
+    json_data = r.json()
+    if cached := not_modified(
+        request,
+        response,
+        json_data.get("metadata", {}).get("resourceVersion"),
+        if_none_match,
+    ):
+        return cached
     if verbose:
-        return r.json()
-    return extract_argo_workflows(r.json())
+        return json_data
+    return extract_argo_workflows(json_data, extra_fields)
+
+
+@app.post("/workflows/status", tags=["Argo Workflows"])
+async def lookup_workflows(
+    lookup: WorkflowLookup,
+    verified: Annotated[bool, "Verify the request with basic auth"] = Depends(
+        verify_request
+    ),
+) -> list[WorkflowLookupResult]:
+    """
+    Look up the summaries of many workflows at once, in the order requested.
+    Workflows in the index are answered from memory; the rest are fetched from
+    Argo concurrently. A workflow that cannot be fetched has an `error` instead.
+    """
+    semaphore = asyncio.Semaphore(WORKFLOW_LOOKUP_CONCURRENCY)
+
+    async def lookup_workflow(ref: WorkflowRef) -> WorkflowLookupResult:
+        summary = workflow_index.get(ref.namespace, ref.name)
+        if summary is not None:
+            return WorkflowLookupResult(
+                namespace=ref.namespace,
+                name=ref.name,
+                workflow=workflow_from_summary(summary),
+            )
+        async with semaphore:
+            try:
+                workflow = await fetch_workflow(ref.namespace, ref.name)
+            except HTTPException as e:
+                return WorkflowLookupResult(
+                    namespace=ref.namespace,
+                    name=ref.name,
+                    error={"status_code": e.status_code, "detail": e.detail},
+                )
+            except (ValueError, httpx.HTTPError) as e:
+                # An unreadable or invalid response only fails this workflow
+                return WorkflowLookupResult(
+                    namespace=ref.namespace,
+                    name=ref.name,
+                    error={
+                        "status_code": 502,
+                        "detail": f"Invalid response from Argo Workflows: {e}",
+                    },
+                )
+        return WorkflowLookupResult(
+            namespace=ref.namespace, name=ref.name, workflow=workflow
+        )
+
+    # Look up each distinct workflow once, even if it is requested several times
+    refs = {(ref.namespace, ref.name): ref for ref in lookup.workflows}
+    results = dict(
+        zip(refs, await asyncio.gather(*map(lookup_workflow, refs.values())))
+    )
+    return [results[(ref.namespace, ref.name)] for ref in lookup.workflows]
 
 
 @app.get("/workflowtemplates/{namespace}", tags=["Argo Workflows"])
 async def list_workflow_templates(
+    request: Request,
+    response: Response,
     namespace: str,
     verbose: Annotated[
         bool, "Return verbose output - full details of the templates"
     ] = False,
+    if_none_match: Annotated[str | None, Header(alias="If-None-Match")] = None,
     verified: Annotated[bool, "Verify the request with basic auth"] = Depends(
         verify_request
     ),
 ) -> list[WorkflowTemplate] | WorkflowTemplate | dict | Union[list, WorkflowTemplate]:
-    r = requests.get(
-        f"{ARGO_SERVER}/api/v1/workflow-templates/{namespace}",
-        verify=VERIFY_TLS,
-        headers={"Authorization": f"Bearer {argo_token()}"},
-    )
-    if r.status_code != 200:
-        raise HTTPException(
-            status_code=r.status_code, detail=parse_argo_error(r.json())
-        )
-    json_data = r.json()
+    templates = await template_cache.templates(namespace)
+    if cached := not_modified(request, response, templates.version, if_none_match):
+        return cached
+    json_data = {"items": list(templates.templates.values())}
     workflow_templates = extract_argo_workflow_templates(json_data)
     if verbose:
         return [json_data, workflow_templates]
@@ -341,25 +1563,26 @@ async def list_workflow_templates(
 
 @app.get("/workflowtemplates/{namespace}/{template_name}", tags=["Argo Workflows"])
 async def get_workflow_template(
+    request: Request,
+    response: Response,
     namespace: str,
     template_name: str,
     verbose: Annotated[
         bool, "Return verbose output - full details of the template"
     ] = False,
+    if_none_match: Annotated[str | None, Header(alias="If-None-Match")] = None,
     verified: Annotated[bool, "Verify the request with basic auth"] = Depends(
         verify_request
     ),
 ) -> WorkflowTemplate | dict | Union[Any, WorkflowTemplate]:
-    r = requests.get(
-        f"{ARGO_SERVER}/api/v1/workflow-templates/{namespace}/{template_name}",
-        verify=VERIFY_TLS,
-        headers={"Authorization": f"Bearer {argo_token()}"},
-    )
-    if r.status_code != 200:
-        raise HTTPException(
-            status_code=r.status_code, detail=parse_argo_error(r.json())
-        )
-    json_data = r.json()
+    json_data = await template_cache.get(namespace, template_name)
+    if cached := not_modified(
+        request,
+        response,
+        json_data.get("metadata", {}).get("resourceVersion"),
+        if_none_match,
+    ):
+        return cached
     workflow_template = WorkflowTemplate(
         namespace=namespace,
         template_name=template_name,
@@ -380,23 +1603,25 @@ async def submit_workflow_from_template(
         verify_request
     ),
 ) -> dict:
-    r = requests.post(
-        f"{ARGO_SERVER}/api/v1/workflows/{workflow_template.namespace}/submit",
-        verify=VERIFY_TLS,
-        headers={"Authorization": f"Bearer {argo_token()}"},
-        data=json.dumps(
-            {
-                "resourceKind": "WorkflowTemplate",
-                "resourceName": workflow_template.template_name,
-                "submitOptions": {
-                    "parameters": (
-                        parse_parameters(workflow_template.parameters)
-                        if workflow_template.parameters
-                        else []
-                    )
-                },
-            }
-        ),
+    # Reject invalid parameters before anything is submitted to Argo
+    schema = await template_cache.schema(
+        workflow_template.namespace, workflow_template.template_name
+    )
+    if errors := schema.validate(workflow_template.parameters or []):
+        raise HTTPException(status_code=422, detail=errors)
+    r = await argo_client.post(
+        f"/api/v1/workflows/{workflow_template.namespace}/submit",
+        json={
+            "resourceKind": "WorkflowTemplate",
+            "resourceName": workflow_template.template_name,
+            "submitOptions": {
+                "parameters": (
+                    parse_parameters(workflow_template.parameters)
+                    if workflow_template.parameters
+                    else []
+                )
+            },
+        },
     )
     if r.status_code != 200:
         raise HTTPException(
@@ -413,11 +1638,162 @@ async def submit_workflow_from_template(
 async def upload_object(
     bucket: str,
     file: UploadFile = File(...),
+    concurrency: Annotated[
+        int | None,
+        Query(ge=1, le=32, description="Number of parts to upload in parallel"),
+    ] = None,
+    verified: Annotated[bool, "Verify the request with basic auth"] = Depends(
+        verify_request
+    ),
+):
+    return await minio_client.run(minio_client.put_object, bucket, file, concurrency)
+
+
+@app.post("/uploads/{bucket}", tags=["s3"])
+async def create_upload_session(
+    bucket: str,
+    object_name: Annotated[str, "The name of the object to create"],
+    content_type: str | None = None,
     verified: Annotated[bool, "Verify the request with basic auth"] = Depends(
         verify_request
     ),
 ):
-    return await minio_client.put_object(bucket, file)
+    return await minio_client.run(
+        minio_client.create_upload_session, bucket, object_name, content_type
+    )
+
+
+@app.put("/uploads/{bucket}/{upload_id}/parts/{part_number}", tags=["s3"])
+async def upload_session_part(
+    bucket: str,
+    upload_id: str,
+    part_number: Annotated[int, Path(ge=1, le=10000)],
+    object_name: Annotated[str, "The name of the object being uploaded"],
+    request: Request,
+    verified: Annotated[bool, "Verify the request with basic auth"] = Depends(
+        verify_request
+    ),
+):
+    too_large = HTTPException(
+        status_code=413,
+        detail=f"Chunks must be at most {minio_client.MAX_CHUNK_SIZE} bytes",
+    )
+    content_length = request.headers.get("content-length")
+    if content_length:
+        try:
+            content_length = int(content_length)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid Content-Length header")
+        if content_length > minio_client.MAX_CHUNK_SIZE:
+            raise too_large
+    # Spool the body as it arrives, so requests waiting for a Minio worker do not
+    # hold their chunks in memory. It is counted as it arrives, so a chunked request
+    # without a Content-Length is rejected as soon as it is too large
+    with tempfile.SpooledTemporaryFile(max_size=1024 * 1024) as body:
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > minio_client.MAX_CHUNK_SIZE:
+                raise too_large
+            body.write(chunk)
+        body.seek(0)
+        return await minio_client.run(
+            minio_client.upload_session_part,
+            bucket,
+            object_name,
+            upload_id,
+            part_number,
+            body,
+            size,
+        )
+
+
+@app.get("/uploads/{bucket}/{upload_id}/parts/{part_number}/presigned", tags=["s3"])
+async def presign_upload_session_part(
+    bucket: str,
+    upload_id: str,
+    part_number: Annotated[int, Path(ge=1, le=10000)],
+    object_name: Annotated[str, "The name of the object being uploaded"],
+    expires: Annotated[
+        int | None, Query(ge=1, description="Lifetime of the URL in seconds")
+    ] = None,
+    verified: Annotated[bool, "Verify the request with basic auth"] = Depends(
+        verify_request
+    ),
+):
+    return await minio_client.run(
+        minio_client.presigned_url,
+        "PUT",
+        bucket,
+        object_name,
+        expires,
+        upload_id=upload_id,
+        part_number=part_number,
+    )
+
+
+@app.get("/uploads/{bucket}/{upload_id}", tags=["s3"])
+async def list_upload_session_parts(
+    bucket: str,
+    upload_id: str,
+    object_name: Annotated[str, "The name of the object being uploaded"],
+    verified: Annotated[bool, "Verify the request with basic auth"] = Depends(
+        verify_request
+    ),
+):
+    return await minio_client.run(
+        minio_client.list_upload_session_parts, bucket, object_name, upload_id
+    )
+
+
+@app.post("/uploads/{bucket}/{upload_id}/complete", tags=["s3"])
+async def complete_upload_session(
+    bucket: str,
+    upload_id: str,
+    object_name: Annotated[str, "The name of the object being uploaded"],
+    part_count: Annotated[
+        int | None,
+        Query(ge=1, le=10000, description="Expected number of parts, if known"),
+    ] = None,
+    verified: Annotated[bool, "Verify the request with basic auth"] = Depends(
+        verify_request
+    ),
+):
+    return await minio_client.run(
+        minio_client.complete_upload_session, bucket, object_name, upload_id, part_count
+    )
+
+
+@app.delete("/uploads/{bucket}/{upload_id}", tags=["s3"])
+async def abort_upload_session(
+    bucket: str,
+    upload_id: str,
+    object_name: Annotated[str, "The name of the object being uploaded"],
+    verified: Annotated[bool, "Verify the request with basic auth"] = Depends(
+        verify_request
+    ),
+):
+    return await minio_client.run(
+        minio_client.abort_upload_session, bucket, object_name, upload_id
+    )
+
+
+@app.get("/object/{bucket}/{file_name}/presigned", tags=["s3"])
+async def presign_object(
+    bucket: str,
+    file_name: str,
+    method: Literal["GET", "PUT"] = "GET",
+    expires: Annotated[
+        int | None, Query(ge=1, description="Lifetime of the URL in seconds")
+    ] = None,
+    version: str | None = None,
+    verified: Annotated[bool, "Verify the request with basic auth"] = Depends(
+        verify_request
+    ),
+):
+    return await minio_client.run(
+        minio_client.presigned_url, method, bucket, file_name, expires, version
+    )
 
 
 @app.get("/object/{bucket}/{file_name}", tags=["s3"])
@@ -426,11 +1802,21 @@ async def get_object(
     file_name: str,
     target_file: str | None = None,
     version: str | None = None,
+    range_header: Annotated[str | None, Header(alias="Range")] = None,
+    if_range: Annotated[str | None, Header(alias="If-Range")] = None,
     verified: Annotated[bool, "Verify the request with basic auth"] = Depends(
         verify_request
     ),
 ):
-    return minio_client.get_object(bucket, file_name, target_file, version)
+    return await minio_client.run(
+        minio_client.get_object,
+        bucket,
+        file_name,
+        target_file,
+        version,
+        range_header,
+        if_range,
+    )
 
 
 # Trigger Argo workflow
@@ -444,23 +1830,19 @@ async def move_object(
         verify_request
     ),
 ) -> dict:
-    r = requests.post(
-        f"{ARGO_SERVER}/api/v1/workflows/argo-workflows/submit",
-        verify=VERIFY_TLS,
-        headers={"Authorization": f"Bearer {argo_token()}"},
-        data=json.dumps(
-            {
-                "resourceKind": "WorkflowTemplate",
-                "resourceName": "data-copy",
-                "submitOptions": {
-                    "generateName": "data-copy-",
-                    "parameters": [
-                        "bucket=ingress",
-                        f"files={files}",
-                    ],
-                },
-            }
-        ),
+    r = await argo_client.post(
+        "/api/v1/workflows/argo-workflows/submit",
+        json={
+            "resourceKind": "WorkflowTemplate",
+            "resourceName": "data-copy",
+            "submitOptions": {
+                "generateName": "data-copy-",
+                "parameters": [
+                    "bucket=ingress",
+                    f"files={files}",
+                ],
+            },
+        },
     )
 
     if r.status_code != 200:
@@ -482,7 +1864,7 @@ async def create_bucket(
         verify_request
     ),
 ):
-    return minio_client.create_bucket(bucket_name, versioning)
+    return await minio_client.run(minio_client.create_bucket, bucket_name, versioning)
 
 
 @app.delete("/object/{bucket}/{file_name}", tags=["s3"])
@@ -494,4 +1876,6 @@ async def delete_object(
         verify_request
     ),
 ):
-    return minio_client.delete_object(bucket, file_name, version)
+    return await minio_client.run(
+        minio_client.delete_object, bucket, file_name, version
+    )
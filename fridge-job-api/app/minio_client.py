@@ -1,23 +1,150 @@
 from fastapi import File, UploadFile, HTTPException
 from fastapi.responses import StreamingResponse
-from io import BytesIO
+from starlette.background import BackgroundTask
+from datetime import datetime, timedelta
 from minio import Minio, versioningconfig, commonconfig
+from minio.credentials import Credentials, Provider
+from minio.datatypes import Part
 from minio.error import S3Error
-from pathlib import Path
-from threading import Lock
+from minio.helpers import MAX_MULTIPART_COUNT, ObjectWriteResult, read_part_data
+from concurrent.futures import ThreadPoolExecutor, wait
+from threading import BoundedSemaphore, Condition, Event, Lock, Thread
+from typing import BinaryIO
 
+from app.service_account_token import ServiceAccountToken
+
+import asyncio
+import certifi
+import math
 import os
-import ssl
+import time
 import urllib3
 import xml.etree.ElementTree as ET
 
 
+def parse_range(range_header: str, size: int) -> tuple[int, int] | None:
+    """
+    Parse a single-range HTTP Range header into inclusive (start, end) byte offsets.
+    Returns None if the header should be ignored and the whole object served, and
+    raises a 416 error if the range cannot be satisfied.
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        return None  # Multiple ranges are not supported
+    first, _, last = spec.strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+            if last and end < start:
+                # A range that ends before it starts is invalid, so is ignored
+                return None
+        else:
+            # Suffix range: the last N bytes of the object
+            start = max(size - int(last), 0)
+            end = size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, min(end, size - 1)
+
+
+class CountingReader:
+    """File-like wrapper that counts the bytes read from the underlying file."""
+
+    def __init__(self, file: BinaryIO):
+        self.file = file
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.file.read(size)
+        self.bytes_read += len(data)
+        return data
+
+
+class ByteSemaphore:
+    """
+    A semaphore counted in bytes, shared by all uploads to bound the part data they
+    hold in memory. A request for more than the whole limit waits until nothing
+    else is held, so that a part larger than the limit can still be sent.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.held = 0
+        self._condition = Condition()
+
+    def acquire(self, size: int) -> None:
+        size = min(size, self.limit)
+        with self._condition:
+            self._condition.wait_for(lambda: self.held + size <= self.limit)
+            self.held += size
+
+    def release(self, size: int) -> None:
+        size = min(size, self.limit)
+        with self._condition:
+            self.held -= size
+            self._condition.notify_all()
+
+
+class RotatingCredentialsProvider(Provider):
+    """
+    Credential provider whose credentials can be swapped in place, so that the Minio
+    client and its connection pool survive STS credential rotation.
+    """
+
+    def __init__(self, credentials: Credentials):
+        self._credentials = credentials
+
+    def retrieve(self) -> Credentials:
+        return self._credentials
+
+    def rotate(self, credentials: Credentials) -> None:
+        # Assignment is atomic, so in-flight requests keep the credentials they signed with
+        self._credentials = credentials
+
+
 class MinioClient:
     SA_TOKEN_FILE = os.getenv("MINIO_SA_TOKEN_PATH", "/minio/token")
     # Kube CA cert path added by mounted service account, needed for TLS with Minio STS
     KUBE_CA_CRT = os.getenv(
         "STS_CA_CERT_FILE", "/var/run/secrets/kubernetes.io/serviceaccount/ca.crt"
     )
+    # Rotate STS credentials this many seconds before they expire
+    REFRESH_MARGIN = int(os.getenv("MINIO_REFRESH_MARGIN", 300))
+    # Wait at least this many seconds between background refreshes
+    MIN_REFRESH_INTERVAL = int(os.getenv("MINIO_MIN_REFRESH_INTERVAL", 30))
+    # Wait this many seconds before retrying a failed background refresh
+    REFRESH_RETRY_INTERVAL = int(os.getenv("MINIO_REFRESH_RETRY_INTERVAL", 10))
+    # Connection pool shared by the S3 and STS endpoints
+    POOL_MAXSIZE = int(os.getenv("MINIO_POOL_MAXSIZE", 10))
+    CONNECT_TIMEOUT = float(os.getenv("MINIO_CONNECT_TIMEOUT", 10))
+    READ_TIMEOUT = float(os.getenv("MINIO_READ_TIMEOUT", 300))
+    # Size of each part in a multipart upload, minimum 5 MiB
+    PART_SIZE = int(os.getenv("MINIO_PART_SIZE", 16 * 1024 * 1024))
+    # Maximum number of parts in an upload; the part size grows for larger files
+    MAX_PART_COUNT = int(os.getenv("MINIO_MAX_PART_COUNT", MAX_MULTIPART_COUNT))
+    # Number of parts uploaded at once for large files (1 disables parallel uploads)
+    UPLOAD_CONCURRENCY = int(os.getenv("MINIO_UPLOAD_CONCURRENCY", 4))
+    # Threads sending the parts of all uploads, and the part data they may buffer
+    UPLOAD_WORKERS = int(os.getenv("MINIO_UPLOAD_WORKERS", 16))
+    UPLOAD_MEMORY_LIMIT = int(os.getenv("MINIO_UPLOAD_MEMORY_LIMIT", 256 * 1024 * 1024))
+    # Largest chunk accepted by the upload session API; each chunk being uploaded
+    # is held in memory
+    MAX_CHUNK_SIZE = int(os.getenv("MINIO_MAX_CHUNK_SIZE", 64 * 1024 * 1024))
+    # Lifetime of presigned URLs, and the longest lifetime a caller may request
+    PRESIGNED_EXPIRY = int(os.getenv("MINIO_PRESIGNED_EXPIRY", 900))
+    PRESIGNED_MAX_EXPIRY = int(os.getenv("MINIO_PRESIGNED_MAX_EXPIRY", 3600))
+    # Size of the chunks read from Minio when streaming an object to the client
+    STREAM_CHUNK_SIZE = int(os.getenv("MINIO_STREAM_CHUNK_SIZE", 1024 * 1024))
+    # Thread pool for blocking Minio SDK calls, and how many calls may wait for it
+    EXECUTOR_WORKERS = int(os.getenv("MINIO_EXECUTOR_WORKERS", 16))
+    EXECUTOR_MAX_QUEUE = int(os.getenv("MINIO_EXECUTOR_MAX_QUEUE", 100))
 
     def __init__(
         self,
@@ -33,6 +160,25 @@ class MinioClient:
         self.tenant = tenant
         self.secure = secure
         self.refresh_lock = Lock()
+        self.sa_token = ServiceAccountToken(self.SA_TOKEN_FILE)
+        self.use_sts = access_key is None or secret_key is None
+        self.credentials_expire_at: float | None = None
+        self.credentials_issued_at: float | None = None
+        self.refreshes = 0
+        self._stop_refresher = Event()
+        self._refresher: Thread | None = None
+        self.credentials_provider: RotatingCredentialsProvider | None = None
+        self.http_client = self._create_http_client()
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.EXECUTOR_WORKERS, thread_name_prefix="minio"
+        )
+        self.executor_stats = {"queued": 0, "active": 0, "completed": 0}
+        # Shared by all uploads, so concurrent uploads do not multiply their limits
+        self.upload_pool = ThreadPoolExecutor(
+            max_workers=self.UPLOAD_WORKERS, thread_name_prefix="minio-upload"
+        )
+        self.upload_memory = ByteSemaphore(self.UPLOAD_MEMORY_LIMIT)
+        self._stats_lock = Lock()
 
         retry_count = 0
         st = None  # Default session token to None if not using STS
@@ -54,16 +200,39 @@ class MinioClient:
         self._create_client(access_key, secret_key, st)
         print("Successfully configured Minio client")
 
+    def _create_http_client(self) -> urllib3.PoolManager:
+        """
+        Create the long-lived connection pool used for both S3 and STS requests.
+        With STS the Minio endpoints are trusted via the kube CA certificate.
+        """
+        if self.use_sts:
+            ca_certs = self.KUBE_CA_CRT
+        else:
+            ca_certs = os.environ.get("SSL_CERT_FILE") or certifi.where()
+        return urllib3.PoolManager(
+            timeout=urllib3.Timeout(
+                connect=self.CONNECT_TIMEOUT, read=self.READ_TIMEOUT
+            ),
+            maxsize=self.POOL_MAXSIZE,
+            cert_reqs="CERT_REQUIRED",
+            ca_certs=ca_certs,
+            retries=urllib3.Retry(
+                total=5, backoff_factor=0.2, status_forcelist=[500, 502, 503, 504]
+            ),
+        )
+
     def _create_client(
         self, access_key: str, secret_key: str, session_token: str | None
     ) -> None:
         try:
+            self.credentials_provider = RotatingCredentialsProvider(
+                Credentials(access_key, secret_key, session_token)
+            )
             self.client = Minio(
                 self.endpoint,
-                access_key=access_key,
-                secret_key=secret_key,
-                session_token=session_token,
+                credentials=self.credentials_provider,
                 secure=self.secure,
+                http_client=self.http_client,
             )
         except Exception as e:
             print(f"Failed to create Minio client: {e}")
@@ -73,19 +242,11 @@ class MinioClient:
     def handle_sts_auth(self):
         """Handle STS authentication with MinIO using Kubernetes service account token."""
 
-        # Set the environment variable for minio client to use the k8s certificate
-        os.environ["SSL_CERT_FILE"] = self.KUBE_CA_CRT
-
         # Read service account token
-        sa_token = Path(self.SA_TOKEN_FILE).read_text().strip()
-
-        ssl_context = ssl.create_default_context(cafile=self.KUBE_CA_CRT)
+        sa_token = self.sa_token.get()
 
-        # Create urllib3 client which accepts kube CA cert
-        http = urllib3.PoolManager(ssl_context=ssl_context)
-
-        # Send the token to the MinIO STS endpoint
-        response = http.request(
+        # Send the token to the MinIO STS endpoint, reusing the shared connection pool
+        response = self.http_client.request(
             "POST",
             f"{self.sts_endpoint}/sts/{self.tenant}?Action=AssumeRoleWithWebIdentity&Version=2011-06-15&WebIdentityToken={sa_token}",
         )
@@ -100,53 +261,167 @@ class MinioClient:
             access_key = credentials.find("sts:AccessKeyId", ns).text
             secret_key = credentials.find("sts:SecretAccessKey", ns).text
             session_token = credentials.find("sts:SessionToken", ns).text
+            expiration = credentials.find("sts:Expiration", ns)
 
-            # Cache the token used here for change detection
-            self._last_token = sa_token
+            # Record when these credentials expire so they can be rotated in advance
+            self.credentials_issued_at = time.time()
+            self.credentials_expire_at = self._parse_expiration(
+                expiration.text if expiration is not None else None
+            )
             return access_key, secret_key, session_token
 
-    def _token_has_changed(self):
-        """Check if the service account token has changed since last read."""
+    @staticmethod
+    def _parse_expiration(expiration: str | None) -> float:
+        """Parse the STS Expiration timestamp, assuming one hour if it is missing."""
         try:
-            current_token = Path(self.SA_TOKEN_FILE).read_text().strip()
-            return current_token != self._last_token
-        except Exception as e:
-            print(f"Error reading token file: {e}")
-            return False
+            return datetime.fromisoformat(expiration).timestamp()
+        except (TypeError, ValueError):
+            return time.time() + 3600
+
+    def _refresh_credentials(self) -> None:
+        """Fetch new STS credentials and rotate them into the existing client."""
+        access_key, secret_key, session_token = self.handle_sts_auth()
+        if not (access_key and secret_key):
+            raise RuntimeError("STS did not return credentials")
+        self.credentials_provider.rotate(
+            Credentials(access_key, secret_key, session_token)
+        )
+        self.refreshes += 1
+
+    def _seconds_until_refresh(self) -> float:
+        if self.credentials_expire_at is None:
+            return 0
+        # Credentials that live no longer than the margin are refreshed halfway
+        # through their lifetime instead
+        lifetime = self.credentials_expire_at - (
+            self.credentials_issued_at or time.time()
+        )
+        margin = min(self.REFRESH_MARGIN, lifetime / 2)
+        return self.credentials_expire_at - margin - time.time()
+
+    def _refresh_loop(self) -> None:
+        """Background loop that rotates STS credentials before they expire."""
+        while not self._stop_refresher.is_set():
+            wait = self._seconds_until_refresh()
+            if wait > 0:
+                self._stop_refresher.wait(wait)
+                continue
+            try:
+                with self.refresh_lock:
+                    self._refresh_credentials()
+                print("Minio client credentials refreshed successfully")
+                # Never refresh in a tight loop, whatever lifetime STS reports
+                self._stop_refresher.wait(self.MIN_REFRESH_INTERVAL)
+            except Exception as e:
+                print(f"Failed to refresh Minio client credentials: {e}")
+                self._stop_refresher.wait(self.REFRESH_RETRY_INTERVAL)
+
+    def start_refresher(self) -> None:
+        """Start rotating STS credentials in the background. Not needed for static keys."""
+        if self.use_sts and self._refresher is None:
+            self._stop_refresher.clear()
+            self._refresher = Thread(
+                target=self._refresh_loop, name="minio-sts-refresh", daemon=True
+            )
+            self._refresher.start()
 
-    def _refresh_token(self):
-        """Refresh the service account token and update the Minio client session token."""
+    def stop_refresher(self) -> None:
+        if self._refresher is not None:
+            self._stop_refresher.set()
+            self._refresher.join()
+            self._refresher = None
+
+    def _ensure_valid_token(self):
+        """
+        Refresh credentials inline only if they have already expired.
+        Normally the background refresher rotates them well before this happens.
+        """
+        if not self.use_sts or time.time() < self.credentials_expire_at:
+            return
         with self.refresh_lock:
-            if not self._token_has_changed():
-                return  # No change in token so refresh unnecessary
-            print("Refreshing Minio client session token")
+            if time.time() < self.credentials_expire_at:
+                return  # Refreshed while waiting for the lock
+            print("Minio client credentials expired, refreshing")
             try:
-                access_key, secret_key, session_token = self.handle_sts_auth()
-
-                if access_key and secret_key:
-                    self._create_client(access_key, secret_key, session_token)
-                    print("Minio client token refreshed successfully")
-                else:
-                    print("Failed to refresh Minio client token")
-                    raise HTTPException(
-                        status_code=500, detail="Failed to refresh Minio token"
-                    )
+                self._refresh_credentials()
             except Exception as e:
-                print(f"Failed to refresh Minio client token: {e}")
+                print(f"Failed to refresh Minio client credentials: {e}")
                 raise HTTPException(
                     status_code=500, detail="Failed to refresh Minio token"
                 )
 
-    def _ensure_valid_token(self):
-        """Check if the token needs to be refreshed"""
-        if self._token_has_changed():
-            self._refresh_token()
+    async def run(self, func, *args, **kwargs):
+        """
+        Run a blocking Minio SDK call on the bounded executor, so that slow storage
+        operations never block the event loop.
+        """
+        with self._stats_lock:
+            if (
+                self.EXECUTOR_MAX_QUEUE
+                and self.executor_stats["queued"] >= self.EXECUTOR_MAX_QUEUE
+            ):
+                raise HTTPException(
+                    status_code=503, detail="Too many pending storage operations"
+                )
+            self.executor_stats["queued"] += 1
+        started = False
+
+        def task():
+            nonlocal started
+            with self._stats_lock:
+                started = True
+                self.executor_stats["queued"] -= 1
+                self.executor_stats["active"] += 1
+            try:
+                return func(*args, **kwargs)
+            finally:
+                with self._stats_lock:
+                    self.executor_stats["active"] -= 1
+                    self.executor_stats["completed"] += 1
+
+        def release(_future=None):
+            # Free the queue slot of a call cancelled before it started, e.g. when
+            # the client disconnects while the call is still queued
+            with self._stats_lock:
+                if not started:
+                    self.executor_stats["queued"] -= 1
+
+        try:
+            future = self.executor.submit(task)
+        except RuntimeError:
+            release()
+            raise
+        future.add_done_callback(release)
+        return await asyncio.wrap_future(future)
+
+    def shutdown_executor(self) -> None:
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        self.upload_pool.shutdown(wait=True, cancel_futures=True)
+
+    def status(self) -> dict:
+        return {
+            "auth": "sts" if self.use_sts else "static",
+            "credentials_expire_in_seconds": (
+                round(self.credentials_expire_at - time.time())
+                if self.credentials_expire_at is not None
+                else None
+            ),
+            "refreshes": self.refreshes,
+            "background_refresh": self._refresher is not None,
+            "executor": {"workers": self.EXECUTOR_WORKERS, **self.executor_stats},
+            "uploads": {
+                "workers": self.UPLOAD_WORKERS,
+                "buffered_bytes": self.upload_memory.held,
+            },
+        }
 
     def handle_minio_error(self, error: S3Error):
-        if error._code in ["NoSuchBucket", "NoSuchKey"]:
+        if error._code in ["NoSuchBucket", "NoSuchKey", "NoSuchUpload"]:
             status = 404
         elif error._code in ["AccessDenied"]:
             status = 403
+        elif error._code in ["InvalidPart", "InvalidPartOrder", "EntityTooSmall"]:
+            status = 400
         else:
             status = 500
 
@@ -169,17 +444,154 @@ class MinioClient:
 
         return {"response": name, "status": 201}
 
-    async def put_object(self, bucket, file: UploadFile = File(...)):
-        self._ensure_valid_token()
+    def _part_size(self, length: int) -> int:
+        """Part size for an upload, grown if needed to stay within MAX_PART_COUNT parts."""
+        if length <= 0:
+            return self.PART_SIZE
+        mib = 1024 * 1024
+        min_part_size = math.ceil(length / self.MAX_PART_COUNT / mib) * mib
+        return max(self.PART_SIZE, min_part_size)
+
+    def _upload_part(
+        self,
+        bucket: str,
+        object_name: str,
+        upload_id: str,
+        part_number: int,
+        data: bytes,
+        buffered: int,
+        slots: BoundedSemaphore,
+    ) -> Part:
         try:
-            content = await file.read()
-            result = self.client.put_object(
-                bucket,
-                file.filename,
-                data=BytesIO(content),
-                length=len(content),
-                content_type=file.content_type,
+            etag = self.client._upload_part(
+                bucket, object_name, data, None, upload_id, part_number
+            )
+            return Part(part_number, etag)
+        finally:
+            # Free the memory and the upload's slot so the next part can be read
+            self.upload_memory.release(buffered)
+            slots.release()
+
+    def _parallel_put_object(
+        self,
+        bucket: str,
+        object_name: str,
+        data: BinaryIO,
+        length: int,
+        content_type: str | None,
+        concurrency: int,
+    ) -> tuple[ObjectWriteResult, int]:
+        """
+        Upload a stream as a multipart upload, sending up to `concurrency` parts at once.
+
+        Parts are read sequentially into memory and handed to the upload pool shared by
+        all uploads. Part data is only read once memory is free, so all uploads together
+        never buffer more than UPLOAD_MEMORY_LIMIT bytes (or one part, if a part is
+        larger than that).
+        """
+        part_size = self._part_size(length)
+        slots = BoundedSemaphore(concurrency)
+        failed = Event()
+
+        def stop_on_failure(future):
+            # Stop reading further parts as soon as any part fails
+            if future.exception() is not None:
+                failed.set()
+
+        upload_id = self.client._create_multipart_upload(
+            bucket,
+            object_name,
+            {"Content-Type": content_type or "application/octet-stream"},
+        )
+        try:
+            futures = []
+            try:
+                while not failed.is_set():
+                    slots.acquire()
+                    self.upload_memory.acquire(part_size)
+                    submitted = False
+                    try:
+                        part_data = read_part_data(data, part_size)
+                        if not part_data:
+                            break
+                        if len(futures) >= self.MAX_PART_COUNT:
+                            raise ValueError(
+                                "Upload exceeds the maximum of "
+                                f"{self.MAX_PART_COUNT} parts"
+                            )
+                        future = self.upload_pool.submit(
+                            self._upload_part,
+                            bucket,
+                            object_name,
+                            upload_id,
+                            len(futures) + 1,
+                            part_data,
+                            part_size,
+                            slots,
+                        )
+                        submitted = True
+                    finally:
+                        if not submitted:
+                            self.upload_memory.release(part_size)
+                            slots.release()
+                    future.add_done_callback(stop_on_failure)
+                    futures.append(future)
+            finally:
+                # Let the parts already sent finish before completing or aborting
+                wait(futures)
+            parts = [future.result() for future in futures]
+
+            result = self.client._complete_multipart_upload(
+                bucket, object_name, upload_id, parts
             )
+        except Exception:
+            self.client._abort_multipart_upload(bucket, object_name, upload_id)
+            raise
+
+        return (
+            ObjectWriteResult(
+                result.bucket_name,
+                result.object_name,
+                result.version_id,
+                result.etag,
+                result.http_headers,
+                location=result.location,
+            ),
+            len(parts),
+        )
+
+    def put_object(
+        self, bucket, file: UploadFile = File(...), concurrency: int | None = None
+    ):
+        self._ensure_valid_token()
+        if concurrency is None:
+            concurrency = self.UPLOAD_CONCURRENCY
+        # Stream the spooled upload to Minio one part at a time, so memory use is
+        # bounded by the part size rather than the size of the file
+        reader = CountingReader(file.file)
+        length = file.size if file.size is not None else -1
+        parts = None
+        start = time.monotonic()
+        try:
+            if concurrency > 1 and length > self._part_size(length):
+                result, parts = self._parallel_put_object(
+                    bucket,
+                    file.filename,
+                    reader,
+                    length,
+                    file.content_type,
+                    concurrency,
+                )
+            else:
+                result = self.client.put_object(
+                    bucket,
+                    file.filename,
+                    data=reader,
+                    length=length,
+                    content_type=file.content_type,
+                    part_size=self._part_size(length),
+                    num_parallel_uploads=1,
+                )
         except S3Error as error:
             self.handle_minio_error(error)
         except Exception as error:
@@ -187,25 +599,89 @@ class MinioClient:
                 status_code=500, detail=f"Unable to upload object: {error}"
             )
 
+        duration = time.monotonic() - start
         return {
             "status": 201,
-            "response": result._location,
+            "response": result.location,
             "version": result.version_id,
+            "bytes_written": reader.bytes_read,
+            "parts": parts,
+            "duration_seconds": round(duration, 3),
+            "throughput_bytes_per_second": (
+                round(reader.bytes_read / duration) if duration > 0 else None
+            ),
         }
 
-    def get_object(self, bucket, file_name, target_file=None, version=None):
+    def _release(self, response) -> None:
+        """Close a streamed object response and return its connection to the pool."""
+        response.close()
+        response.release_conn()
+
+    def _stream_object(self, response):
+        try:
+            yield from response.stream(self.STREAM_CHUNK_SIZE)
+        finally:
+            self._release(response)
+
+    def get_object(
+        self,
+        bucket,
+        file_name,
+        target_file=None,
+        version=None,
+        range_header: str | None = None,
+        if_range: str | None = None,
+    ):
         self._ensure_valid_token()
         if not target_file:
             target_file = file_name
         try:
-            result = self.client.get_object(bucket, file_name, target_file, version)
+            stat = self.client.stat_object(bucket, file_name, version_id=version)
+            etag = f'"{stat.etag}"'
+            headers = {
+                "Content-Disposition": f'attachment; filename="{target_file}"',
+                "Accept-Ranges": "bytes",
+                "ETag": etag,
+            }
+            if stat.last_modified is not None:
+                headers["Last-Modified"] = stat.last_modified.strftime(
+                    "%a, %d %b %Y %H:%M:%S GMT"
+                )
+
+            # A stale If-Range validator means the client must get the whole object
+            byte_range = None
+            if range_header and (if_range is None or if_range == etag):
+                byte_range = parse_range(range_header, stat.size)
+
+            if byte_range is None:
+                status_code = 200
+                offset, length = 0, stat.size
+            else:
+                start, end = byte_range
+                status_code = 206
+                offset, length = start, end - start + 1
+                headers["Content-Range"] = f"bytes {start}-{end}/{stat.size}"
+            headers["Content-Length"] = str(length)
+
+            # A zero length reads to the end of the object, so skip the request entirely
+            if length == 0:
+                return StreamingResponse(
+                    iter(()), media_type="application/octet-stream", headers=headers
+                )
+
+            result = self.client.get_object(
+                bucket, file_name, offset=offset, length=length, version_id=version
+            )
             return StreamingResponse(
-                result,
+                self._stream_object(result),
+                status_code=status_code,
                 media_type="application/octet-stream",
-                headers={
-                    "Content-Disposition": f'attachment; filename="{target_file}"'
-                },
+                headers=headers,
+                # Also release the connection if the client disconnects mid-stream
+                background=BackgroundTask(self._release, result),
             )
+        except HTTPException:
+            raise
         except S3Error as error:
             self.handle_minio_error(error)
         except Exception as error:
@@ -213,6 +689,55 @@ class MinioClient:
                 status_code=500, detail=f"Unable to get object from bucket: {error}"
             )
 
+    def put_file(
+        self,
+        bucket,
+        object_name,
+        file: BinaryIO,
+        length: int,
+        content_type="application/octet-stream",
+    ):
+        """Upload a local file object of known length, e.g. a temporary file."""
+        self._ensure_valid_token()
+        try:
+            result = self.client.put_object(
+                bucket,
+                object_name,
+                data=file,
+                length=length,
+                content_type=content_type,
+                part_size=self._part_size(length),
+            )
+        except S3Error as error:
+            self.handle_minio_error(error)
+        except Exception as error:
+            raise HTTPException(
+                status_code=500, detail=f"Unable to upload object: {error}"
+            )
+
+        return {"status": 201, "response": result.location, "bytes_written": length}
+
+    def read_object(self, bucket, object_name, offset=0, length=0) -> bytes:
+        """
+        Read an object, or `length` bytes of it from `offset`, into memory.
+        Only for small objects and ranges; use get_object to stream large ones.
+        """
+        self._ensure_valid_token()
+        try:
+            response = self.client.get_object(
+                bucket, object_name, offset=offset, length=length
+            )
+            try:
+                return response.read()
+            finally:
+                self._release(response)
+        except S3Error as error:
+            self.handle_minio_error(error)
+        except Exception as error:
+            raise HTTPException(
+                status_code=500, detail=f"Unable to read object: {error}"
+            )
+
     def check_object_exists(self, bucket, file_name, version=None):
         self._ensure_valid_token()
         try:
@@ -245,3 +770,197 @@ class MinioClient:
             )
 
         return {"status": 200, "response": file_name, "version": version}
+
+    def create_upload_session(self, bucket, object_name, content_type=None):
+        """Start a multipart upload that can be filled in with chunks over several requests."""
+        self._ensure_valid_token()
+        try:
+            upload_id = self.client._create_multipart_upload(
+                bucket,
+                object_name,
+                {"Content-Type": content_type or "application/octet-stream"},
+            )
+        except S3Error as error:
+            self.handle_minio_error(error)
+        except Exception as error:
+            raise HTTPException(
+                status_code=500, detail=f"Unable to create upload session: {error}"
+            )
+
+        return {
+            "status": 201,
+            "response": object_name,
+            "bucket": bucket,
+            "upload_id": upload_id,
+        }
+
+    def upload_session_part(
+        self, bucket, object_name, upload_id, part_number, data: BinaryIO, length: int
+    ):
+        self._ensure_valid_token()
+        try:
+            etag = self.client._upload_part(
+                bucket, object_name, data.read(length), None, upload_id, part_number
+            )
+        except S3Error as error:
+            self.handle_minio_error(error)
+        except Exception as error:
+            raise HTTPException(
+                status_code=500, detail=f"Unable to upload part: {error}"
+            )
+
+        return {
+            "status": 200,
+            "response": object_name,
+            "upload_id": upload_id,
+            "part_number": part_number,
+            "etag": etag,
+            "size": length,
+        }
+
+    def _list_session_parts(self, bucket, object_name, upload_id) -> list[Part]:
+        parts = []
+        marker = None
+        while True:
+            result = self.client._list_parts(
+                bucket, object_name, upload_id, part_number_marker=marker
+            )
+            parts.extend(result.parts)
+            if not result.is_truncated:
+                return parts
+            marker = result.next_part_number_marker
+
+    def list_upload_session_parts(self, bucket, object_name, upload_id):
+        """List the chunks that have been received for an upload session."""
+        self._ensure_valid_token()
+        try:
+            parts = self._list_session_parts(bucket, object_name, upload_id)
+        except S3Error as error:
+            self.handle_minio_error(error)
+        except Exception as error:
+            raise HTTPException(
+                status_code=500, detail=f"Unable to list uploaded parts: {error}"
+            )
+
+        return {
+            "status": 200,
+            "response": object_name,
+            "upload_id": upload_id,
+            "parts": [
+                {"part_number": part.part_number, "etag": part.etag, "size": part.size}
+                for part in parts
+            ],
+            "bytes_received": sum(part.size or 0 for part in parts),
+        }
+
+    def complete_upload_session(
+        self, bucket, object_name, upload_id, part_count: int | None = None
+    ):
+        """
+        Assemble the received chunks into the final object.
+        If `part_count` is given, parts 1 to `part_count` must all have been received.
+        """
+        self._ensure_valid_token()
+        try:
+            parts = self._list_session_parts(bucket, object_name, upload_id)
+            if part_count is not None:
+                received = {part.part_number for part in parts}
+                missing = [n for n in range(1, part_count + 1) if n not in received]
+                if missing:
+                    raise HTTPException(
+                        status_code=409,
+                        detail={"error": "Upload is incomplete", "missing": missing},
+                    )
+            if not parts:
+                raise HTTPException(status_code=409, detail="No parts uploaded")
+            parts.sort(key=lambda part: part.part_number)
+            result = self.client._complete_multipart_upload(
+                bucket,
+                object_name,
+                upload_id,
+                [Part(part.part_number, part.etag) for part in parts],
+            )
+        except HTTPException:
+            raise
+        except S3Error as error:
+            self.handle_minio_error(error)
+        except Exception as error:
+            raise HTTPException(
+                status_code=500, detail=f"Unable to complete upload: {error}"
+            )
+
+        return {
+            "status": 201,
+            "response": result.location,
+            "version": result.version_id,
+            "parts": len(parts),
+            "bytes_written": sum(part.size or 0 for part in parts),
+        }
+
+    def abort_upload_session(self, bucket, object_name, upload_id):
+        """Abort an upload session and discard any chunks already received."""
+        self._ensure_valid_token()
+        try:
+            self.client._abort_multipart_upload(bucket, object_name, upload_id)
+        except S3Error as error:
+            self.handle_minio_error(error)
+        except Exception as error:
+            raise HTTPException(
+                status_code=500, detail=f"Unable to abort upload: {error}"
+            )
+
+        return {"status": 200, "response": object_name, "upload_id": upload_id}
+
+    def presigned_url(
+        self,
+        method,
+        bucket,
+        object_name,
+        expires: int | None = None,
+        version=None,
+        upload_id=None,
+        part_number: int | None = None,
+    ):
+        """
+        Issue a short-lived presigned URL so a client can transfer an object directly
+        with Minio. With `upload_id` and `part_number`, the URL uploads one part of an
+        upload session.
+        """
+        self._ensure_valid_token()
+        expires = min(expires or self.PRESIGNED_EXPIRY, self.PRESIGNED_MAX_EXPIRY)
+        # URLs signed with STS credentials stop working when the credentials expire
+        if self.credentials_expire_at is not None:
+            expires = max(
+                1, min(expires, int(self.credentials_expire_at - time.time()))
+            )
+        extra_query_params = None
+        if upload_id is not None:
+            extra_query_params = {"uploadId": upload_id, "partNumber": str(part_number)}
+        try:
+            url = self.client.get_presigned_url(
+                method,
+                bucket,
+                object_name,
+                expires=timedelta(seconds=expires),
+                version_id=version,
+                extra_query_params=extra_query_params,
+            )
+        except S3Error as error:
+            self.handle_minio_error(error)
+        except Exception as error:
+            raise HTTPException(
+                status_code=500, detail=f"Unable to create presigned URL: {error}"
+            )
+
+        print(
+            f"Issued presigned {method} URL for {bucket}/{object_name}"
+            + (f" part {part_number} of upload {upload_id}" if upload_id else "")
+            + f", expires in {expires}s"
+        )
+        return {
+            "status": 200,
+            "response": object_name,
+            "method": method,
+            "url": url,
+            "expires_in_seconds": expires,
+        }
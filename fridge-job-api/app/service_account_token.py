@@ -0,0 +1,108 @@
+from pathlib import Path
+from threading import Lock
+
+import base64
+import json
+import os
+import time
+
+
+class ServiceAccountToken:
+    """
+    In-process cache of a projected Kubernetes service account token.
+
+    Kubernetes rotates the token by atomically replacing the file on the projected volume,
+    so the cached token is only re-read when the file's inode, mtime or size change.
+    The file is checked at most once every `check_interval` seconds, and on every call
+    once the cached token is within `refresh_margin` seconds of expiring.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        expiry_seconds: int = 3600,
+        refresh_margin: int = 300,
+        check_interval: float = 5.0,
+    ):
+        self.path = Path(path)
+        self.expiry_seconds = expiry_seconds
+        self.refresh_margin = refresh_margin
+        self.check_interval = check_interval
+        self.lock = Lock()
+        self.reloads = 0
+        self.issued_at: float | None = None
+        self.expires_at: float | None = None
+        self._token: str | None = None
+        self._file_id: tuple | None = None
+        self._last_check = 0.0
+
+    def _near_expiry(self) -> bool:
+        return (
+            self.expires_at is not None
+            and time.time() >= self.expires_at - self.refresh_margin
+        )
+
+    def get(self) -> str:
+        """Return the current token, re-reading the file only if it has changed."""
+        if (
+            self._token is not None
+            and time.monotonic() - self._last_check < self.check_interval
+            and not self._near_expiry()
+        ):
+            return self._token
+
+        with self.lock:
+            try:
+                stat = os.stat(self.path)
+                file_id = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+                if (
+                    self._token is None
+                    or file_id != self._file_id
+                    or self._near_expiry()
+                ):
+                    self._load(file_id, stat.st_mtime)
+            except OSError as e:
+                # Keep serving the cached token if the file is briefly unavailable
+                # while Kubernetes swaps it
+                if self._token is None:
+                    raise
+                print(f"Error reading token file {self.path}: {e}")
+            self._last_check = time.monotonic()
+            return self._token
+
+    def _load(self, file_id: tuple, mtime: float) -> None:
+        token = self.path.read_text().strip()
+        if token != self._token:
+            self.reloads += 1
+        self._token = token
+        self._file_id = file_id
+
+        claims = self._decode_claims(token)
+        self.issued_at = claims.get("iat", mtime)
+        self.expires_at = claims.get("exp", self.issued_at + self.expiry_seconds)
+
+    @staticmethod
+    def _decode_claims(token: str) -> dict:
+        """Read the issued and expiry times from the JWT payload, without verifying it."""
+        try:
+            payload = token.split(".")[1]
+            payload += "=" * (-len(payload) % 4)
+            claims = json.loads(base64.urlsafe_b64decode(payload))
+            return {k: float(claims[k]) for k in ("iat", "exp") if k in claims}
+        except (IndexError, ValueError, TypeError):
+            return {}
+
+    def status(self) -> dict:
+        """Summary of the cached token, without the token itself."""
+        now = time.time()
+        return {
+            "path": str(self.path),
+            "loaded": self._token is not None,
+            "age_seconds": (
+                round(now - self.issued_at) if self.issued_at is not None else None
+            ),
+            "expires_in_seconds": (
+                round(self.expires_at - now) if self.expires_at is not None else None
+            ),
+            "reloads": self.reloads,
+        }
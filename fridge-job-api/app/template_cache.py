@@ -0,0 +1,168 @@
+from dataclasses import dataclass, field
+from fastapi import HTTPException
+
+from app.argo_client import ArgoClient, parse_argo_error
+from app.template_schema import TemplateSchema
+
+import asyncio
+import hashlib
+import time
+
+
+def resource_version(template: dict) -> str | None:
+    return (template.get("metadata") or {}).get("resourceVersion")
+
+
+@dataclass(slots=True)
+class NamespaceTemplates:
+    """The cached WorkflowTemplates of one namespace, by name."""
+
+    templates: dict[str, dict] = field(default_factory=dict)
+    # Changes whenever a template is added, changed or removed; used for ETags
+    version: str | None = None
+    # When the whole namespace was last listed, and when each template was fetched
+    checked_at: float = 0.0
+    template_checked_at: dict[str, float] = field(default_factory=dict)
+
+    def _update_version(self) -> None:
+        digest = hashlib.sha256()
+        for name, template in self.templates.items():
+            digest.update(f"{name}={resource_version(template)};".encode())
+        self.version = digest.hexdigest()[:16]
+
+    def replace(self, templates: dict[str, dict]) -> None:
+        self.templates = dict(sorted(templates.items()))
+        self._update_version()
+        self.checked_at = time.monotonic()
+        self.template_checked_at = dict.fromkeys(self.templates, self.checked_at)
+
+    def put(self, name: str, template: dict) -> None:
+        self.templates = dict(sorted({**self.templates, name: template}.items()))
+        self._update_version()
+        self.template_checked_at[name] = time.monotonic()
+
+    def discard(self, name: str) -> None:
+        if self.templates.pop(name, None) is not None:
+            self._update_version()
+        self.template_checked_at.pop(name, None)
+
+
+class WorkflowTemplateCache:
+    """
+    In-process cache of the WorkflowTemplates of each namespace.
+
+    Templates only change on deploy, so they are served from memory for `ttl`
+    seconds. After that, a single template is revalidated by fetching just that
+    template, and a namespace's templates by listing them all again; Argo
+    Workflows cannot list only the resourceVersions of templates, nor watch
+    them. Concurrent requests for the same namespace share one list.
+    Changes can take up to `ttl` seconds to be seen.
+    """
+
+    def __init__(self, argo_client: ArgoClient, ttl: float = 30.0):
+        self.argo_client = argo_client
+        self.ttl = ttl
+        self._namespaces: dict[str, NamespaceTemplates] = {}
+        # Only held for namespaces in the cache, or being loaded into it
+        self._locks: dict[str, asyncio.Lock] = {}
+        # Compiled parameter schemas, with the resourceVersion they were compiled from
+        self._schemas: dict[tuple[str, str], tuple[str | None, TemplateSchema]] = {}
+        self.hits = 0
+        self.revalidations = 0
+        self.fetches = 0
+
+    async def _get(self, path: str, params: dict | None = None) -> dict:
+        r = await self.argo_client.get(path, params=params)
+        if r.status_code != 200:
+            raise HTTPException(
+                status_code=r.status_code, detail=parse_argo_error(r.json())
+            )
+        return r.json()
+
+    def _fresh(self, checked_at: float | None) -> bool:
+        return checked_at is not None and time.monotonic() - checked_at < self.ttl
+
+    async def templates(self, namespace: str) -> NamespaceTemplates:
+        """The templates of a namespace, listed again if older than the TTL."""
+        cached = self._namespaces.get(namespace)
+        if cached is not None and self._fresh(cached.checked_at):
+            self.hits += 1
+            return cached
+        lock = self._locks.setdefault(namespace, asyncio.Lock())
+        try:
+            async with lock:
+                # Another request may have listed the namespace meanwhile
+                cached = self._namespaces.get(namespace)
+                if cached is not None and self._fresh(cached.checked_at):
+                    self.hits += 1
+                    return cached
+                data = await self._get(f"/api/v1/workflow-templates/{namespace}")
+                items = data.get("items") or []
+                self.fetches += len(items)
+                if cached is None:
+                    cached = self._namespaces[namespace] = NamespaceTemplates()
+                else:
+                    self.revalidations += 1
+                cached.replace({item["metadata"]["name"]: item for item in items})
+                # Drop the schemas of templates that have been deleted
+                for key in [
+                    key
+                    for key in self._schemas
+                    if key[0] == namespace and key[1] not in cached.templates
+                ]:
+                    del self._schemas[key]
+                return cached
+        finally:
+            # Do not keep locks for namespaces that could not be loaded
+            if namespace not in self._namespaces:
+                self._locks.pop(namespace, None)
+
+    async def get(self, namespace: str, name: str) -> dict:
+        """
+        A single template, fetched again on its own once older than the TTL.
+        Missing templates are reported with Argo's error.
+        """
+        cached = self._namespaces.get(namespace)
+        if cached is not None and self._fresh(cached.template_checked_at.get(name)):
+            self.hits += 1
+            return cached.templates[name]
+        try:
+            template = await self._get(f"/api/v1/workflow-templates/{namespace}/{name}")
+        except HTTPException as e:
+            if e.status_code == 404 and cached is not None:
+                cached.discard(name)
+                self._schemas.pop((namespace, name), None)
+            raise
+        self.fetches += 1
+        if cached is None:
+            # Not listed yet, so the namespace is stale until it is
+            cached = self._namespaces[namespace] = NamespaceTemplates()
+        elif name in cached.templates:
+            self.revalidations += 1
+        cached.put(name, template)
+        return template
+
+    async def schema(self, namespace: str, name: str) -> TemplateSchema:
+        """
+        The compiled parameter schema of a template, compiled again only when the
+        template changes.
+        """
+        template = await self.get(namespace, name)
+        version = resource_version(template)
+        compiled = self._schemas.get((namespace, name))
+        if compiled is None or compiled[0] != version:
+            compiled = (version, TemplateSchema.from_template(template))
+            self._schemas[(namespace, name)] = compiled
+        return compiled[1]
+
+    def status(self) -> dict:
+        return {
+            "ttl_seconds": self.ttl,
+            "namespaces": len(self._namespaces),
+            "templates": sum(
+                len(cached.templates) for cached in self._namespaces.values()
+            ),
+            "hits": self.hits,
+            "revalidations": self.revalidations,
+            "fetches": self.fetches,
+        }
@@ -0,0 +1,110 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class ParameterSpec:
+    name: str
+    required: bool = False
+    default: str | None = None
+    enum: frozenset[str] | None = None
+
+
+def parameter_spec(parameter: dict, default_key: str = "value") -> ParameterSpec:
+    """
+    Compile one parameter of a WorkflowTemplate. A parameter is required if it
+    has neither a default value nor a `valueFrom` source.
+    """
+    default = parameter.get(default_key)
+    enum = parameter.get("enum")
+    return ParameterSpec(
+        name=parameter["name"],
+        required=default is None and not parameter.get("valueFrom"),
+        default=None if default is None else str(default),
+        enum=frozenset(str(value) for value in enum) if enum else None,
+    )
+
+
+@dataclass(slots=True)
+class TemplateSchema:
+    """
+    The parameters a WorkflowTemplate accepts on submission, compiled once from its
+    `spec.arguments.parameters` and the input parameters of its entrypoint, so that
+    submissions can be checked without a round trip to Argo Workflows.
+    """
+
+    parameters: dict[str, ParameterSpec]
+
+    @classmethod
+    def from_template(cls, template: dict) -> "TemplateSchema":
+        spec = template.get("spec") or {}
+        parameters: dict[str, ParameterSpec] = {}
+        # Submitted parameters become workflow arguments, which are passed on to the
+        # entrypoint's inputs of the same name
+        entrypoint = next(
+            (
+                t
+                for t in spec.get("templates") or []
+                if t.get("name") == spec.get("entrypoint")
+            ),
+            {},
+        )
+        for parameter in (entrypoint.get("inputs") or {}).get("parameters") or []:
+            if parameter.get("name"):
+                parameters[parameter["name"]] = parameter_spec(parameter, "default")
+        for parameter in (spec.get("arguments") or {}).get("parameters") or []:
+            if not parameter.get("name"):
+                continue
+            argument = parameter_spec(parameter)
+            input = parameters.get(argument.name)
+            if argument.required and input is not None and not input.required:
+                # Argo uses the input's default when the argument has no value
+                argument = ParameterSpec(
+                    name=argument.name,
+                    default=input.default,
+                    enum=argument.enum or input.enum,
+                )
+            parameters[argument.name] = argument
+        return cls(parameters)
+
+    def validate(self, parameters: list[dict]) -> list[dict]:
+        """
+        Check submitted parameters, given as `{"name": ..., "value": ...}` dicts.
+        Returns a list of errors in the style of FastAPI validation errors, which is
+        empty if the parameters are valid.
+        """
+        errors = []
+
+        def error(name, message: str, error_type: str) -> None:
+            errors.append(
+                {
+                    "loc": ["body", "parameters", name],
+                    "msg": message,
+                    "type": error_type,
+                }
+            )
+
+        seen = set()
+        for parameter in parameters:
+            name = parameter.get("name")
+            if not name:
+                error(None, "Parameter has no name", "missing_name")
+                continue
+            if name in seen:
+                error(name, f"Parameter {name} is given more than once", "duplicate")
+            seen.add(name)
+            spec = self.parameters.get(name)
+            if spec is None:
+                error(name, f"Unknown parameter {name}", "unknown_parameter")
+            elif "value" not in parameter:
+                error(name, f"Parameter {name} has no value", "missing_value")
+            elif spec.enum is not None and str(parameter["value"]) not in spec.enum:
+                error(
+                    name,
+                    f"Value of parameter {name} must be one of: "
+                    + ", ".join(sorted(spec.enum)),
+                    "enum",
+                )
+        for name, spec in self.parameters.items():
+            if spec.required and name not in seen:
+                error(name, f"Missing required parameter {name}", "missing")
+        return errors
@@ -0,0 +1,636 @@
+from bisect import bisect_left, insort
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from app.argo_client import ArgoClient
+
+import asyncio
+import json
+import re
+import time
+
+# Phases after which a workflow will not change again
+TERMINAL_PHASES = {"Succeeded", "Failed", "Error"}
+
+WORKFLOW_TEMPLATE_LABEL = "workflows.argoproj.io/workflow-template"
+WORKFLOW_PHASE_LABEL = "workflows.argoproj.io/phase"
+
+# Workflow fields kept in the index, requested from Argo for both lists and watches.
+# The watch also requests status.nodes, to report node transitions to subscribers.
+INDEX_FIELDS = [
+    "metadata.name",
+    "metadata.namespace",
+    "metadata.resourceVersion",
+    "metadata.creationTimestamp",
+    "metadata.labels",
+    "spec.workflowTemplateRef",
+    "status.phase",
+    "status.finishedAt",
+]
+
+
+@dataclass(slots=True)
+class WorkflowSummary:
+    name: str
+    namespace: str
+    phase: str | None = None
+    created_at: str | None = None
+    finished_at: str | None = None
+    template: str | None = None
+    resource_version: str | None = None
+    labels: dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def from_argo(cls, item: dict) -> "WorkflowSummary":
+        metadata = item.get("metadata") or {}
+        status = item.get("status") or {}
+        labels = metadata.get("labels") or {}
+        template_ref = (item.get("spec") or {}).get("workflowTemplateRef") or {}
+        return cls(
+            name=metadata.get("name"),
+            namespace=metadata.get("namespace"),
+            phase=status.get("phase"),
+            created_at=metadata.get("creationTimestamp"),
+            finished_at=status.get("finishedAt"),
+            template=template_ref.get("name") or labels.get(WORKFLOW_TEMPLATE_LABEL),
+            resource_version=metadata.get("resourceVersion"),
+            labels=labels,
+        )
+
+
+LABEL_KEY = r"[A-Za-z0-9]([-A-Za-z0-9_./]*[A-Za-z0-9])?"
+LABEL_VALUE = r"([A-Za-z0-9]([-A-Za-z0-9_.]*[A-Za-z0-9])?)?"
+
+
+@dataclass(slots=True)
+class LabelRequirement:
+    """One requirement of a Kubernetes label selector, e.g. `team in (a,b)`."""
+
+    key: str
+    operator: str  # one of "=", "!=", "in", "notin", "exists", "!exists"
+    values: tuple[str, ...] = ()
+
+    def matches(self, labels: dict[str, str]) -> bool:
+        match self.operator:
+            case "=" | "in":
+                return labels.get(self.key) in self.values
+            case "!=" | "notin":
+                return labels.get(self.key) not in self.values
+            case "exists":
+                return self.key in labels
+            case "!exists":
+                return self.key not in labels
+
+
+def parse_label_selector(selector: str | None) -> list[LabelRequirement]:
+    """
+    Parse a Kubernetes label selector, supporting both equality-based (`a=b`, `a!=b`)
+    and set-based (`a in (b,c)`, `a notin (b)`, `a`, `!a`) requirements.
+    Raises ValueError if the selector is not valid.
+    """
+    if not selector or not selector.strip():
+        return []
+    requirements = []
+    # Split on commas that are not inside the parentheses of a set
+    for part in re.split(r",(?![^(]*\))", selector):
+        part = part.strip()
+        if match := re.fullmatch(rf"!\s*({LABEL_KEY})", part):
+            requirements.append(LabelRequirement(match[1], "!exists"))
+        elif match := re.fullmatch(rf"({LABEL_KEY})", part):
+            requirements.append(LabelRequirement(match[1], "exists"))
+        elif match := re.fullmatch(
+            rf"({LABEL_KEY})\s*(==|=|!=)\s*({LABEL_VALUE})", part
+        ):
+            operator = "!=" if match[3] == "!=" else "="
+            requirements.append(LabelRequirement(match[1], operator, (match[4],)))
+        elif match := re.fullmatch(rf"({LABEL_KEY})\s+(in|notin)\s*\(([^()]*)\)", part):
+            values = tuple(value.strip() for value in match[4].split(","))
+            if not all(re.fullmatch(LABEL_VALUE, value) for value in values):
+                raise ValueError(f"Invalid label selector requirement: {part}")
+            requirements.append(LabelRequirement(match[1], match[3], values))
+        else:
+            raise ValueError(f"Invalid label selector requirement: {part}")
+    return requirements
+
+
+def discard_from(index: dict, key, value) -> None:
+    """Remove a value from one of the sets in an index, dropping the set if empty."""
+    values = index.get(key)
+    if values is not None:
+        values.discard(value)
+        if not values:
+            del index[key]
+
+
+def workflow_event(
+    event_type: str, summary: WorkflowSummary, previous_phase: str | None = None
+) -> dict:
+    """An event about a whole workflow, published to subscribers."""
+    return {
+        "type": event_type,
+        "namespace": summary.namespace,
+        "workflow": summary.name,
+        "phase": summary.phase,
+        "previous_phase": previous_phase,
+        "resource_version": summary.resource_version,
+    }
+
+
+class Subscription:
+    """
+    A subscriber's queue of events from one namespace, optionally limited to some
+    workflows and event types. If the subscriber falls more than `max_queue` events behind, it is
+    marked as lagged and receives no further events, so that one slow client
+    cannot hold up the watch or grow without bound.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        workflows: set[str] | None = None,
+        event_types: set[str] | None = None,
+        max_queue: int = 1000,
+    ):
+        self.namespace = namespace
+        self.workflows = workflows
+        self.event_types = event_types
+        self.queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=max_queue)
+        self.lagged = False
+
+    def publish(self, event: dict) -> None:
+        if self.lagged or (
+            self.event_types is not None and event["type"] not in self.event_types
+        ):
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.lagged = True
+
+    async def get(self, timeout: float | None = None) -> dict | None:
+        """
+        Wait for the next event. Returns None if none arrives within `timeout`
+        seconds, and a `lagged` event once a lagged subscriber has drained its queue.
+        """
+        if self.lagged and self.queue.empty():
+            return {"type": "lagged", "namespace": self.namespace}
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class NamespaceIndex:
+    """
+    Workflow summaries for one namespace, plus the state of its watch.
+
+    Alongside the summaries by name, secondary indexes are kept by phase,
+    originating template and label, and a list sorted by creation time, so that
+    filtered queries only touch the workflows that can match.
+    """
+
+    def __init__(self):
+        self.workflows: dict[str, WorkflowSummary] = {}
+        self.by_phase: dict[str | None, set[str]] = defaultdict(set)
+        self.by_template: dict[str, set[str]] = defaultdict(set)
+        self.by_label: dict[tuple[str, str], set[str]] = defaultdict(set)
+        self.by_created: list[tuple[str, str]] = []
+        # Last known (display name, type, phase) of each node of unfinished workflows
+        self.nodes: dict[str, dict[str, tuple[str, str, str]]] = {}
+        # Workflows listed by Argo but evicted to keep within max_workflows
+        self.evicted: set[str] = set()
+        self.resource_version: str | None = None
+        self.synced = False
+        self.truncated = False
+        self.relists = 0
+        self.events = 0
+        self.last_event_at: float | None = None
+        self.last_list_at: float | None = None
+
+    def add(self, summary: WorkflowSummary) -> None:
+        self.remove(summary.name)
+        name = summary.name
+        self.workflows[name] = summary
+        self.by_phase[summary.phase].add(name)
+        if summary.template:
+            self.by_template[summary.template].add(name)
+        for label in summary.labels.items():
+            self.by_label[label].add(name)
+        insort(self.by_created, (summary.created_at or "", name))
+
+    def remove(self, name: str) -> None:
+        summary = self.workflows.pop(name, None)
+        if summary is None:
+            return
+        discard_from(self.by_phase, summary.phase, name)
+        if summary.template:
+            discard_from(self.by_template, summary.template, name)
+        for label in summary.labels.items():
+            discard_from(self.by_label, label, name)
+        key = (summary.created_at or "", name)
+        position = bisect_left(self.by_created, key)
+        if position < len(self.by_created) and self.by_created[position] == key:
+            del self.by_created[position]
+
+    def replace(self, workflows: dict[str, WorkflowSummary]) -> None:
+        """Rebuild the index from a complete list of workflows."""
+        self.workflows = {}
+        self.by_phase.clear()
+        self.by_template.clear()
+        self.by_label.clear()
+        self.by_created = []
+        for summary in workflows.values():
+            self.add(summary)
+
+
+class WorkflowIndex:
+    """
+    In-memory index of workflow summaries, kept up to date from the Argo watch API.
+
+    For each namespace a background task lists all workflows once, then follows the
+    workflow event stream from the list's resourceVersion. If the stream breaks or
+    reports an error the namespace is listed again, so missed events are never lost,
+    and a full relist also happens every `resync_interval` seconds to correct drift.
+    Each namespace holds at most `max_workflows` summaries; beyond that the oldest
+    finished workflows are evicted and the namespace is marked as truncated.
+    """
+
+    def __init__(
+        self,
+        argo_client: ArgoClient,
+        namespaces: list[str],
+        max_workflows: int = 10000,
+        resync_interval: float = 600.0,
+        list_page_size: int = 500,
+        retry_interval: float = 5.0,
+        subscriber_queue_size: int = 1000,
+    ):
+        self.argo_client = argo_client
+        self.namespaces = namespaces
+        self.max_workflows = max_workflows
+        self.resync_interval = resync_interval
+        self.list_page_size = list_page_size
+        self.retry_interval = retry_interval
+        self.subscriber_queue_size = subscriber_queue_size
+        self.indexes = {namespace: NamespaceIndex() for namespace in namespaces}
+        # Subscriptions by namespace, then by workflow name or None for all workflows
+        self.subscriptions: dict[str, dict[str | None, set[Subscription]]] = {
+            namespace: defaultdict(set) for namespace in namespaces
+        }
+        self._tasks: list[asyncio.Task] = []
+
+    async def start(self) -> None:
+        """Start watching each namespace. Called once on application startup."""
+        for namespace in self.namespaces:
+            self._tasks.append(
+                asyncio.create_task(
+                    self._run(namespace), name=f"workflow-index-{namespace}"
+                )
+            )
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def ready(self, namespace: str) -> bool:
+        """Whether list queries for a namespace can be answered from the index."""
+        index = self.indexes.get(namespace)
+        return index is not None and index.synced and not index.truncated
+
+    def get(self, namespace: str, name: str) -> WorkflowSummary | None:
+        index = self.indexes.get(namespace)
+        if index is None or not index.synced:
+            return None
+        return index.workflows.get(name)
+
+    def subscribe(
+        self,
+        namespace: str,
+        workflows: list[str] | None = None,
+        event_types: set[str] | None = None,
+    ) -> Subscription:
+        """
+        Subscribe to phase and node transitions in a watched namespace, optionally
+        only for the named workflows and types of event. Call `unsubscribe` when done.
+        """
+        subscription = Subscription(
+            namespace,
+            set(workflows) if workflows else None,
+            event_types,
+            max_queue=self.subscriber_queue_size,
+        )
+        for key in subscription.workflows or [None]:
+            self.subscriptions[namespace][key].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscriptions = self.subscriptions[subscription.namespace]
+        for key in subscription.workflows or [None]:
+            discard_from(subscriptions, key, subscription)
+
+    def _publish(self, namespace: str, workflow: str, event: dict) -> None:
+        # Only subscribers to this workflow or the whole namespace are visited,
+        # so waiters on other workflows cost nothing
+        subscriptions = self.subscriptions[namespace]
+        for key in (None, workflow):
+            for subscription in subscriptions.get(key, ()):
+                subscription.publish(event)
+
+    def resource_version(self, namespace: str) -> str | None:
+        """The latest resourceVersion seen in a namespace, which changes with any workflow."""
+        index = self.indexes.get(namespace)
+        if index is None or not index.synced:
+            return None
+        return index.resource_version
+
+    def list_workflows(
+        self,
+        namespace: str,
+        phases: list[str] | None = None,
+        template: str | None = None,
+        selector: list[LabelRequirement] | None = None,
+        created_after: str | None = None,
+        created_before: str | None = None,
+    ) -> list[WorkflowSummary]:
+        """
+        Indexed workflows in a namespace matching all of the given filters, newest
+        first. Creation times are RFC 3339 strings as used by Kubernetes, with
+        `created_after` inclusive and `created_before` exclusive.
+        """
+        index = self.indexes[namespace]
+        selector = selector or []
+
+        # Narrow the candidates using the secondary indexes
+        candidates: list[set[str]] = []
+        if phases:
+            candidates.append(
+                set().union(*(index.by_phase.get(phase, ()) for phase in phases))
+            )
+        if template:
+            candidates.append(index.by_template.get(template, set()))
+        for requirement in selector:
+            if requirement.operator in ("=", "in"):
+                candidates.append(
+                    set().union(
+                        *(
+                            index.by_label.get((requirement.key, value), ())
+                            for value in requirement.values
+                        )
+                    )
+                )
+
+        low = bisect_left(index.by_created, (created_after,)) if created_after else 0
+        high = (
+            bisect_left(index.by_created, (created_before,))
+            if created_before
+            else len(index.by_created)
+        )
+        if candidates:
+            candidates.sort(key=len)
+            names = candidates[0].intersection(*candidates[1:])
+            if len(names) < high - low:
+                # Fewer matches than workflows in the time window, so check the
+                # creation time of each match rather than scanning the window
+                keys = [
+                    (index.workflows[name].created_at or "", name) for name in names
+                ]
+                window = sorted(
+                    key
+                    for key in keys
+                    if (not created_after or key[0] >= created_after)
+                    and (not created_before or key[0] < created_before)
+                )
+            else:
+                window = [key for key in index.by_created[low:high] if key[1] in names]
+        else:
+            window = index.by_created[low:high]
+
+        summaries = []
+        for _, name in reversed(window):
+            summary = index.workflows[name]
+            if all(requirement.matches(summary.labels) for requirement in selector):
+                summaries.append(summary)
+        return summaries
+
+    async def _run(self, namespace: str) -> None:
+        index = self.indexes[namespace]
+        while True:
+            try:
+                await self._list(namespace)
+                while time.monotonic() - index.last_list_at < self.resync_interval:
+                    await self._watch(namespace)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Workflow index for {namespace} lost sync: {e}")
+                index.synced = False
+                await asyncio.sleep(self.retry_interval)
+
+    async def _list(self, namespace: str) -> None:
+        """Replace the namespace's index with a fresh list from Argo."""
+        index = self.indexes[namespace]
+        workflows: dict[str, WorkflowSummary] = {}
+        resource_version = None
+        params = {
+            "listOptions.limit": self.list_page_size,
+            "fields": ",".join(
+                ["metadata.continue", "metadata.resourceVersion"]
+                + [f"items.{path}" for path in INDEX_FIELDS]
+            ),
+        }
+        while True:
+            r = await self.argo_client.get(
+                f"/api/v1/workflows/{namespace}", params=params
+            )
+            if r.status_code != 200:
+                raise RuntimeError(f"list failed with status {r.status_code}")
+            json_data = r.json()
+            for item in json_data.get("items") or []:
+                summary = WorkflowSummary.from_argo(item)
+                workflows[summary.name] = summary
+            metadata = json_data.get("metadata") or {}
+            resource_version = metadata.get("resourceVersion") or resource_version
+            if not metadata.get("continue"):
+                break
+            params["listOptions.continue"] = metadata["continue"]
+
+        if index.relists and self.subscriptions[namespace]:
+            # Report changes that were missed while the watch was down
+            for name, summary in workflows.items():
+                previous = index.workflows.get(name)
+                if previous is None and name in index.evicted:
+                    # Not new, only evicted earlier; its previous phase is unknown
+                    continue
+                if previous is None or previous.phase != summary.phase:
+                    self._publish(
+                        namespace,
+                        name,
+                        workflow_event(
+                            "phase", summary, previous.phase if previous else None
+                        ),
+                    )
+            for name, previous in index.workflows.items():
+                if name not in workflows:
+                    self._publish(namespace, name, workflow_event("deleted", previous))
+        index.replace(workflows)
+        index.nodes = {
+            name: nodes for name, nodes in index.nodes.items() if name in workflows
+        }
+        index.truncated = False
+        self._evict(index)
+        index.evicted = {name for name in workflows if name not in index.workflows}
+        index.resource_version = resource_version
+        index.synced = True
+        index.relists += 1
+        index.last_list_at = time.monotonic()
+
+    async def _watch(self, namespace: str) -> None:
+        """Apply workflow events to the index until the stream ends."""
+        index = self.indexes[namespace]
+        # End the stream by the time the next full resync is due
+        remaining = self.resync_interval - (time.monotonic() - index.last_list_at)
+        params = {
+            "listOptions.timeoutSeconds": max(1, int(remaining)),
+            "fields": ",".join(
+                ["result.type"]
+                + [f"result.object.{path}" for path in INDEX_FIELDS + ["status.nodes"]]
+            ),
+        }
+        if index.resource_version:
+            params["listOptions.resourceVersion"] = index.resource_version
+        async with self.argo_client.stream(
+            "GET",
+            f"/api/v1/workflow-events/{namespace}",
+            params=params,
+            timeout=self.resync_interval + 60,
+        ) as r:
+            if r.status_code != 200:
+                raise RuntimeError(f"watch failed with status {r.status_code}")
+            async for line in r.aiter_lines():
+                if not line:
+                    continue
+                event = json.loads(line)
+                if "error" in event:
+                    # Typically the resourceVersion is too old; relist to resync
+                    raise RuntimeError(event["error"].get("message", "watch error"))
+                result = event.get("result") or {}
+                self._apply(index, result.get("type"), result.get("object") or {})
+
+    def _apply(self, index: NamespaceIndex, event_type: str, item: dict) -> None:
+        summary = WorkflowSummary.from_argo(item)
+        if not summary.name:
+            return
+        previous = index.workflows.get(summary.name)
+        index.evicted.discard(summary.name)
+        if event_type == "DELETED":
+            index.remove(summary.name)
+            index.nodes.pop(summary.name, None)
+            self._publish(
+                summary.namespace, summary.name, workflow_event("deleted", summary)
+            )
+        else:
+            index.add(summary)
+            self._evict(index)
+            nodes = (item.get("status") or {}).get("nodes")
+            # Nodes of finished workflows do not change, so are no longer tracked
+            if nodes is not None and not (
+                previous is not None and previous.phase in TERMINAL_PHASES
+            ):
+                # Workflows known from a list have no node baseline yet; record
+                # their nodes silently rather than reporting every node as new
+                self._apply_nodes(
+                    index,
+                    summary,
+                    nodes,
+                    publish=previous is None or summary.name in index.nodes,
+                )
+            if previous is None or previous.phase != summary.phase:
+                self._publish(
+                    summary.namespace,
+                    summary.name,
+                    workflow_event(
+                        "phase", summary, previous.phase if previous else None
+                    ),
+                )
+            if summary.phase in TERMINAL_PHASES:
+                index.nodes.pop(summary.name, None)
+        if summary.resource_version:
+            index.resource_version = summary.resource_version
+        index.events += 1
+        index.last_event_at = time.time()
+
+    def _apply_nodes(
+        self,
+        index: NamespaceIndex,
+        summary: WorkflowSummary,
+        nodes: dict,
+        publish: bool = True,
+    ) -> None:
+        """Record the workflow's node phases, publishing any that changed."""
+        known = index.nodes.get(summary.name, {})
+        current = {}
+        for node_id, node in nodes.items():
+            state = (node.get("displayName"), node.get("type"), node.get("phase"))
+            current[node_id] = state
+            previous = known.get(node_id)
+            if publish and (previous is None or previous[2] != state[2]):
+                self._publish(
+                    summary.namespace,
+                    summary.name,
+                    {
+                        "type": "node",
+                        "namespace": summary.namespace,
+                        "workflow": summary.name,
+                        "node_id": node_id,
+                        "node_name": state[0],
+                        "node_type": state[1],
+                        "phase": state[2],
+                        "previous_phase": previous[2] if previous else None,
+                        "resource_version": summary.resource_version,
+                    },
+                )
+        index.nodes[summary.name] = current
+
+    def _evict(self, index: NamespaceIndex) -> None:
+        """Keep the index within max_workflows, dropping the oldest finished first."""
+        excess = len(index.workflows) - self.max_workflows
+        if excess <= 0:
+            return
+        # Evict a little more than needed so this does not run on every event
+        excess += self.max_workflows // 10
+        oldest_first = sorted(
+            index.workflows.values(),
+            key=lambda summary: (
+                summary.phase not in TERMINAL_PHASES,
+                summary.created_at or "",
+            ),
+        )
+        for summary in oldest_first[:excess]:
+            index.remove(summary.name)
+            index.nodes.pop(summary.name, None)
+            index.evicted.add(summary.name)
+        index.truncated = True
+
+    def status(self) -> dict:
+        now = time.time()
+        return {
+            namespace: {
+                "synced": index.synced,
+                "truncated": index.truncated,
+                "workflows": len(index.workflows),
+                "resource_version": index.resource_version,
+                "relists": index.relists,
+                "events": index.events,
+                "subscribers": len(
+                    set().union(*self.subscriptions[namespace].values())
+                ),
+                "seconds_since_last_event": (
+                    round(now - index.last_event_at)
+                    if index.last_event_at is not None
+                    else None
+                ),
+            }
+            for namespace, index in self.indexes.items()
+        }
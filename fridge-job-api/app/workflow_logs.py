@@ -0,0 +1,285 @@
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from fastapi import HTTPException
+
+from app.argo_client import ArgoClient
+
+import asyncio
+import heapq
+import httpx
+import json
+import tempfile
+
+POD_NAME_FORMAT_ANNOTATION = "workflows.argoproj.io/pod-name-format"
+
+# Argo truncates the pod name prefix so the name fits the Kubernetes limit of
+# 253 characters, leaving room for the hash
+MAX_POD_NAME_PREFIX = 253 - 10 - 1
+
+# Workflow fields needed to find the pods of a workflow
+POD_FIELDS = "metadata.name,metadata.annotations,status.nodes"
+
+# Node phases for which no pod is ever created
+PODLESS_PHASES = {"Skipped", "Omitted"}
+
+
+def parse_log_line(line: str, timestamps: bool) -> dict:
+    """
+    Parse one line of an Argo log stream into a dict with the `pod_name` and
+    `content` of the log line, or the `error` reported by Argo. With `timestamps`,
+    the timestamp that Kubernetes puts at the start of each line is split out.
+    """
+    entry = json.loads(line)
+    if "error" in entry:
+        return {"error": entry["error"].get("message", "unknown error")}
+    result = entry.get("result") or {}
+    log = {"pod_name": result.get("podName"), "content": result.get("content", "")}
+    if timestamps:
+        timestamp, _, content = log["content"].partition(" ")
+        log.update(timestamp=timestamp, content=content)
+    return log
+
+
+def fnv32a(data: bytes) -> int:
+    """32-bit FNV-1a hash, as used by Argo to name pods."""
+    hash = 0x811C9DC5
+    for byte in data:
+        hash ^= byte
+        hash = (hash * 0x01000193) & 0xFFFFFFFF
+    return hash
+
+
+def pod_name(workflow_name: str, node: dict, version: str = "v2") -> str:
+    """
+    The name of the pod Argo creates for a workflow node. With the v1 format the pod
+    is named after the node ID; with v2, the default since Argo 3.4, it is named
+    after the workflow and template, plus a hash of the node name.
+    """
+    if version == "v1":
+        return node["id"]
+    node_name = node.get("name", "")
+    if node_name == workflow_name:
+        return workflow_name
+    template = (node.get("templateRef") or {}).get("template") or node.get(
+        "templateName", ""
+    )
+    prefix = workflow_name if ".inline" in node_name else f"{workflow_name}-{template}"
+    return f"{prefix[:MAX_POD_NAME_PREFIX]}-{fnv32a(node_name.encode())}"
+
+
+@dataclass(slots=True)
+class WorkflowPod:
+    node_id: str
+    node_name: str
+    display_name: str
+    pod_name: str
+    phase: str | None = None
+    started_at: str | None = None
+
+
+def workflow_pods(workflow: dict) -> list[WorkflowPod]:
+    """The pods of a workflow, found from its node statuses, in the order they started."""
+    metadata = workflow.get("metadata") or {}
+    name = metadata.get("name")
+    version = (metadata.get("annotations") or {}).get(POD_NAME_FORMAT_ANNOTATION, "v2")
+    pods = [
+        WorkflowPod(
+            node_id=node_id,
+            node_name=node.get("name", node_id),
+            display_name=node.get("displayName") or node.get("name", node_id),
+            pod_name=pod_name(name, {"id": node_id, **node}, version),
+            phase=node.get("phase"),
+            started_at=node.get("startedAt"),
+        )
+        for node_id, node in ((workflow.get("status") or {}).get("nodes") or {}).items()
+        if node.get("type") == "Pod" and node.get("phase") not in PODLESS_PHASES
+    ]
+    return sorted(pods, key=lambda pod: (pod.started_at or "", pod.node_name))
+
+
+class WorkflowLogs:
+    """
+    Streams the logs of all pods of a workflow as one stream.
+
+    Without follow, pod logs are read from Argo concurrently, at most `concurrency`
+    at a time so that a large fan-out does not exhaust the Argo connection pool.
+    Each pod's log is spooled to a temporary file as it is read, then the files are
+    merged in timestamp order; memory use stays constant however many pods there
+    are. With follow, every pod's log is streamed at once, since a followed stream
+    stays open until its pod finishes, and lines are passed on in the order they
+    arrive. At most `max_followers` followed streams of whole workflows are open
+    at a time, each holding one Argo connection per pod.
+    """
+
+    def __init__(
+        self, argo_client: ArgoClient, concurrency: int = 8, max_followers: int = 4
+    ):
+        self.argo_client = argo_client
+        self.concurrency = concurrency
+        self.max_followers = max_followers
+        self.followers = 0
+
+    def can_follow(self) -> bool:
+        return self.followers < self.max_followers
+
+    async def _read_pod(
+        self,
+        semaphore: asyncio.Semaphore,
+        namespace: str,
+        workflow_name: str,
+        pod: WorkflowPod,
+        params: dict,
+        follow: bool,
+    ) -> AsyncIterator[dict]:
+        """Yield the log entries of one pod, tagged with its node."""
+        node = {"pod_name": pod.pod_name, "node": pod.display_name}
+        async with semaphore:
+            try:
+                r = await self.argo_client.open_stream(
+                    "GET",
+                    f"/api/v1/workflows/{namespace}/{workflow_name}/log",
+                    params={**params, "podName": pod.pod_name},
+                    read_timeout=not follow,
+                )
+            except HTTPException as e:
+                yield {**node, "error": str(e.detail)}
+                return
+            try:
+                if r.status_code != 200:
+                    await r.aread()
+                    try:
+                        message = r.json().get("message", r.text)
+                    except ValueError:
+                        message = r.text
+                    yield {**node, "error": message}
+                    return
+                async for line in r.aiter_lines():
+                    if line:
+                        yield {**parse_log_line(line, timestamps=True), **node}
+            except httpx.HTTPError as e:
+                yield {**node, "error": str(e)}
+            finally:
+                await r.aclose()
+
+    def pod_log(
+        self,
+        namespace: str,
+        workflow_name: str,
+        pod: WorkflowPod,
+        container: str = "main",
+    ) -> AsyncIterator[dict]:
+        """
+        Yield the complete log of one finished pod, as entries with a `timestamp`
+        and `content`, or an `error`.
+        """
+        params = {"logOptions.container": container, "logOptions.timestamps": "true"}
+        return self._read_pod(
+            asyncio.Semaphore(1), namespace, workflow_name, pod, params, follow=False
+        )
+
+    def stream(
+        self,
+        namespace: str,
+        workflow_name: str,
+        pods: list[WorkflowPod],
+        container: str = "main",
+        follow: bool = False,
+        tail_lines: int | None = None,
+        since_seconds: int | None = None,
+        limit_bytes: int | None = None,
+    ) -> AsyncIterator[dict]:
+        """
+        Yield log entries from all the given pods, each with its `pod_name`, `node`
+        (the node's display name), `timestamp` and `content`, or an `error`.
+        Options other than `follow` apply to each pod separately.
+        """
+        params = {"logOptions.container": container, "logOptions.timestamps": "true"}
+        if follow:
+            params["logOptions.follow"] = "true"
+        if tail_lines is not None:
+            params["logOptions.tailLines"] = tail_lines
+        if since_seconds is not None:
+            params["logOptions.sinceSeconds"] = since_seconds
+        if limit_bytes is not None:
+            params["logOptions.limitBytes"] = limit_bytes
+
+        # Followed streams stay open until their pod finishes, so limiting them to
+        # fewer than the number of pods would hold back the later pods indefinitely
+        semaphore = asyncio.Semaphore(max(len(pods), 1) if follow else self.concurrency)
+        readers = [
+            self._read_pod(semaphore, namespace, workflow_name, pod, params, follow)
+            for pod in pods
+        ]
+        if follow:
+            return self._interleave(readers)
+        return self._merge(readers)
+
+    async def _interleave(self, readers: list[AsyncIterator[dict]]):
+        """Yield entries from all readers in the order they arrive."""
+        if not self.can_follow():
+            yield {"error": "Too many log streams are being followed; try again later"}
+            return
+        self.followers += 1
+        # A bounded queue, so fast pods wait for the client rather than buffering
+        queue: asyncio.Queue[dict | None] = asyncio.Queue(maxsize=1000)
+
+        async def forward(reader: AsyncIterator[dict]) -> None:
+            try:
+                async for entry in reader:
+                    await queue.put(entry)
+            finally:
+                # Mark this reader as done, unless the whole stream is being cancelled
+                if not asyncio.current_task().cancelling():
+                    await queue.put(None)
+
+        tasks = [asyncio.create_task(forward(reader)) for reader in readers]
+        try:
+            remaining = len(tasks)
+            while remaining:
+                entry = await queue.get()
+                if entry is None:
+                    remaining -= 1
+                else:
+                    yield entry
+        finally:
+            self.followers -= 1
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _merge(self, readers: list[AsyncIterator[dict]]):
+        """
+        Read all readers to completion, then yield their entries in timestamp
+        order. Errors are yielded after the log lines.
+        """
+        errors = []
+
+        async def spool(reader: AsyncIterator[dict], file) -> None:
+            async for entry in reader:
+                if "error" in entry:
+                    errors.append(entry)
+                else:
+                    file.write(json.dumps(entry) + "\n")
+            file.seek(0)
+
+        files = [tempfile.TemporaryFile("w+") for _ in readers]
+        tasks = [
+            asyncio.create_task(spool(reader, file))
+            for reader, file in zip(readers, files)
+        ]
+        try:
+            await asyncio.gather(*tasks)
+            # Each pod's log is already in time order, so a k-way merge suffices
+            for entry in heapq.merge(
+                *((json.loads(line) for line in file) for file in files),
+                key=lambda entry: entry.get("timestamp", ""),
+            ):
+                yield entry
+            for entry in errors:
+                yield entry
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for file in files:
+                file.close()
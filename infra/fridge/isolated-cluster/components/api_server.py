@@ -171,6 +171,7 @@ class ApiServer(ComponentResource):
                 "MINIO_URL": args.minio_url,
                 "MINIO_TENANT_NAME": args.minio_tenant_name,
                 "VERIFY_TLS": str(args.verify_tls),
+                "WORKFLOW_INDEX_NAMESPACES": args.argo_workflows_ns,
             },
             opts=child_opts,
         )